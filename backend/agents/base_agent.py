@@ -70,12 +70,16 @@ class BaseAgent(ABC):
         system_prompt: str,
         tools: Optional[List[BaseTool]] = None,
         temperature: float = None,
-        max_tokens: int = None
+        max_tokens: int = None,
+        keep_history: bool = True
     ):
         self.name = name
         self.description = description
         self.system_prompt = system_prompt
         self.tools = tools or []
+        # Shared (process-wide) agents must not carry one user's turns into
+        # another user's prompt, so they are built with keep_history=False.
+        self.keep_history = keep_history
         
         # Initialize LLM.
         # NOTE: Token limit parameters vary across OpenAI/SDK/LangChain versions.
@@ -157,9 +161,6 @@ class BaseAgent(ABC):
                     "chat_history": self.chat_history.messages
                 })
                 output = result.get("output", "")
-                # Update chat history
-                self.chat_history.add_user_message(full_input)
-                self.chat_history.add_ai_message(output)
             else:
                 # Run with simple LLM
                 messages = [
@@ -169,7 +170,9 @@ class BaseAgent(ABC):
                 ]
                 response = await self.llm.ainvoke(messages)
                 output = response.content
-                # Update chat history
+            
+            # Update chat history
+            if self.keep_history:
                 self.chat_history.add_user_message(full_input)
                 self.chat_history.add_ai_message(output)
             
@@ -188,37 +188,37 @@ class MoneyManagementOrchestrator(BaseAgent):
     async def _run_ocr_agent(self, input_text: str, context: Optional[Dict] = None) -> Dict:
         if self._ocr_agent is None:
             from agents.block_1.ocr_agent import OCRAgent
-            self._ocr_agent = OCRAgent()
+            self._ocr_agent = OCRAgent(keep_history=self.keep_history)
         return await self._ocr_agent.run(input_text, context)
     
     async def _run_watchdog_agent(self, input_text: str, context: Optional[Dict] = None) -> Dict:
         if self._watchdog_agent is None:
             from agents.block_1.watchdog_agent import WatchdogAgent
-            self._watchdog_agent = WatchdogAgent()
+            self._watchdog_agent = WatchdogAgent(keep_history=self.keep_history)
         return await self._watchdog_agent.run(input_text, context)
     
     async def _run_categorize_agent(self, input_text: str, context: Optional[Dict] = None) -> Dict:
         if self._categorize_agent is None:
             from agents.block_1.categorize_agent import CategorizeAgent
-            self._categorize_agent = CategorizeAgent()
+            self._categorize_agent = CategorizeAgent(keep_history=self.keep_history)
         return await self._categorize_agent.run(input_text, context)
     
     async def _run_investment_detector_agent(self, input_text: str, context: Optional[Dict] = None) -> Dict:
         if self._investment_detector_agent is None:
             from agents.block_1.investment_detector_agent import InvestmentDetectorAgent
-            self._investment_detector_agent = InvestmentDetectorAgent()
+            self._investment_detector_agent = InvestmentDetectorAgent(keep_history=self.keep_history)
         return await self._investment_detector_agent.run(input_text, context)
     
     async def _run_money_growth_agent(self, input_text: str, context: Optional[Dict] = None) -> Dict:
         if self._money_growth_agent is None:
             from agents.block_1.money_growth_agent import MoneyGrowthAgent
-            self._money_growth_agent = MoneyGrowthAgent()
+            self._money_growth_agent = MoneyGrowthAgent(keep_history=self.keep_history)
         return await self._money_growth_agent.run(input_text, context)
     
     async def _run_news_agent(self, input_text: str, context: Optional[Dict] = None) -> Dict:
         if self._news_agent is None:
             from agents.block_1.news_agent import Block1NewsAgent
-            self._news_agent = Block1NewsAgent()
+            self._news_agent = Block1NewsAgent(keep_history=self.keep_history)
         return await self._news_agent.run(input_text, context)
     
     def _aggregate_results(self, results: Dict[str, Any]) -> Dict[str, Any]:
@@ -3,11 +3,15 @@ Investment Orchestrator (Orchestrator 2)
 Coordinates investment analysis and portfolio management
 """
 
-from typing import Any, Dict, List, Optional
+from typing import Any, AsyncIterator, Awaitable, Dict, List, Optional
 from datetime import datetime
+import asyncio
+import json
+
+from langchain_core.messages import HumanMessage, SystemMessage
 
 from agents.base_agent import BaseAgent
-from agents.prompts.system_prompts import ORCHESTRATOR_2_PROMPT
+from agents.prompts.system_prompts import INVESTMENT_QUESTION_PROMPT, ORCHESTRATOR_2_PROMPT
 from app.core.logging import get_logger
 
 
@@ -58,6 +62,9 @@ class InvestmentOrchestrator(BaseAgent):
         """Route request to appropriate investment agent."""
         results = {}
         
+        if intent == "general_query":
+            return await self.answer_question(user_input, context)
+        
         if intent in ["advisory", "plan", "recommend", "guide"]:
             return await self.run_comprehensive_advisory(user_input, context)
 
@@ -79,6 +86,54 @@ class InvestmentOrchestrator(BaseAgent):
         
         return self._aggregate_results(results)
     
+    async def astream_question(
+        self,
+        user_input: str,
+        context: Optional[Dict[str, Any]] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Streaming counterpart of answer_question; yields the answer token by token."""
+        async for chunk in self.llm.astream(self._question_messages(user_input, context)):
+            if chunk.content:
+                yield {
+                    "type": "content",
+                    "agent_name": self.name,
+                    "content": chunk.content
+                }
+    
+    async def answer_question(
+        self,
+        user_input: str,
+        context: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """Answer a free-form investment question with a single LLM call."""
+        try:
+            response = await self.llm.ainvoke(self._question_messages(user_input, context))
+            return {
+                "success": True,
+                "output": response.content,
+                "agent_name": self.name,
+                "timestamp": datetime.utcnow().isoformat()
+            }
+        except Exception as e:
+            logger.error("Question answering failed", agent=self.name, error=str(e))
+            return {
+                "success": False,
+                "error": str(e),
+                "agent_name": self.name,
+                "timestamp": datetime.utcnow().isoformat()
+            }
+    
+    @staticmethod
+    def _question_messages(user_input: str, context: Optional[Dict[str, Any]] = None) -> list:
+        """Prompt for a general_query; context is appended the way BaseAgent.run does."""
+        full_input = user_input
+        if context:
+            full_input = f"{user_input}\n\nContext:\n{json.dumps(context, indent=2)}"
+        return [
+            SystemMessage(content=INVESTMENT_QUESTION_PROMPT),
+            HumanMessage(content=full_input)
+        ]
+    
     async def generate_investment_report(
         self,
         user_id: str,
@@ -171,6 +226,66 @@ class InvestmentOrchestrator(BaseAgent):
         
         return self._aggregate_results(results)
 
+    async def run_market_trends(self, context: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Run the News Agent step of the advisory workflow on its own."""
+        news_input = "Find top current market trends, hot sectors, and economic outlook for investment."
+        return await self._run_news_agent(news_input, context)
+    
+    async def run_comprehensive_advisory_parallel(
+        self,
+        user_input: str,
+        context: Optional[Dict[str, Any]] = None,
+        news_task: Optional[Awaitable[Dict[str, Any]]] = None
+    ) -> Dict[str, Any]:
+        """
+        Same workflow as run_comprehensive_advisory, with independent agents run
+        concurrently:
+        (Analysis || News) -> (Stock || Investment)
+        
+        Stock and Investment prompts embed the Analysis/News output, so only the
+        two stages are serialized. Callers that already started the news step
+        (see run_market_trends) can pass it in as news_task.
+        """
+        context = context or {}
+        results = {}
+        
+        # Stage 1: Analysis (surplus & risk) and News (trends) are independent
+        logger.info("Stage 1: Running Analysis and News Agents")
+        analysis_input = f"Analyze spending behavior from transactions to calculate investable surplus and risk profile. Context: {user_input}"
+        if news_task is None:
+            news_task = self.run_market_trends(context)
+        analysis_result, news_result = await asyncio.gather(
+            self._run_analysis_agent(analysis_input, context),
+            news_task,
+            return_exceptions=True
+        )
+        results["analysis"] = self._safe_result(analysis_result, "analysis_agent")
+        results["news"] = self._safe_result(news_result, "block2_news_agent")
+        
+        surplus_context = results["analysis"].get("output", "")
+        market_context = results["news"].get("output", "")
+        
+        # Stage 2: Stock (growth) and Investment (safety) recommendations
+        logger.info("Stage 2: Running Stock and Investment Agents")
+        stock_input = (
+            f"Based on this financial profile: {surplus_context}\n"
+            f"And these market trends: {market_context}\n"
+            f"Recommend exactly TOP 5 Stocks, Mutual Funds, or SIPs for growth."
+        )
+        invest_input = (
+            f"Based on this financial profile: {surplus_context}\n"
+            f"Recommend exactly TOP 5 Fixed Income options (FD, RD, PSU) for safety and stability."
+        )
+        stock_result, invest_result = await asyncio.gather(
+            self._run_stock_agent(stock_input, context),
+            self._run_investment_agent(invest_input, context),
+            return_exceptions=True
+        )
+        results["stock"] = self._safe_result(stock_result, "stock_agent")
+        results["investment"] = self._safe_result(invest_result, "investment_agent")
+        
+        return self._aggregate_results(results)
+
     async def research_stock(
         self,
         symbol: str,
@@ -202,27 +317,40 @@ class InvestmentOrchestrator(BaseAgent):
     async def _run_analysis_agent(self, input_text: str, context: Optional[Dict] = None) -> Dict:
         if self._analysis_agent is None:
             from agents.block_2.analysis_agent import AnalysisAgent
-            self._analysis_agent = AnalysisAgent()
+            self._analysis_agent = AnalysisAgent(keep_history=self.keep_history)
         return await self._analysis_agent.run(input_text, context)
     
     async def _run_stock_agent(self, input_text: str, context: Optional[Dict] = None) -> Dict:
         if self._stock_agent is None:
             from agents.block_2.stock_agent import StockAgent
-            self._stock_agent = StockAgent()
+            self._stock_agent = StockAgent(keep_history=self.keep_history)
         return await self._stock_agent.run(input_text, context)
     
     async def _run_investment_agent(self, input_text: str, context: Optional[Dict] = None) -> Dict:
         if self._investment_agent is None:
             from agents.block_2.investment_agent import InvestmentAgent
-            self._investment_agent = InvestmentAgent()
+            self._investment_agent = InvestmentAgent(keep_history=self.keep_history)
         return await self._investment_agent.run(input_text, context)
     
     async def _run_news_agent(self, input_text: str, context: Optional[Dict] = None) -> Dict:
         if self._news_agent is None:
             from agents.block_2.news_agent import Block2NewsAgent
-            self._news_agent = Block2NewsAgent()
+            self._news_agent = Block2NewsAgent(keep_history=self.keep_history)
         return await self._news_agent.run(input_text, context)
     
+    @staticmethod
+    def _safe_result(result: Any, agent_name: str) -> Dict[str, Any]:
+        """Turn an exception returned by asyncio.gather into a failed agent result."""
+        if isinstance(result, BaseException):
+            logger.error("Sub-agent failed", agent=agent_name, error=str(result))
+            return {
+                "success": False,
+                "error": str(result),
+                "agent_name": agent_name,
+                "timestamp": datetime.utcnow().isoformat()
+            }
+        return result
+    
     def _aggregate_results(self, results: Dict[str, Any]) -> Dict[str, Any]:
         """Aggregate results from multiple agents."""
         aggregated = {
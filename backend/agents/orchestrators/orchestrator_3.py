@@ -131,19 +131,19 @@ class FinancialProductsOrchestrator(BaseAgent):
     async def _run_credit_card_agent(self, input_text: str, context: Optional[Dict] = None) -> Dict:
         if self._credit_card_agent is None:
             from agents.block_3.credit_card_agent import CreditCardAgent
-            self._credit_card_agent = CreditCardAgent()
+            self._credit_card_agent = CreditCardAgent(keep_history=self.keep_history)
         return await self._credit_card_agent.run(input_text, context)
     
     async def _run_itr_agent(self, input_text: str, context: Optional[Dict] = None) -> Dict:
         if self._itr_agent is None:
             from agents.block_3.itr_agent import ITRAgent
-            self._itr_agent = ITRAgent()
+            self._itr_agent = ITRAgent(keep_history=self.keep_history)
         return await self._itr_agent.run(input_text, context)
     
     async def _run_loan_agent(self, input_text: str, context: Optional[Dict] = None) -> Dict:
         if self._loan_agent is None:
             from agents.block_3.loan_agent import LoanAgent
-            self._loan_agent = LoanAgent()
+            self._loan_agent = LoanAgent(keep_history=self.keep_history)
         return await self._loan_agent.run(input_text, context)
     
     def _aggregate_results(self, results: Dict[str, Any]) -> Dict[str, Any]:
@@ -3,20 +3,48 @@ Agent Insights API Endpoints
 Real-time AI-powered financial insights
 """
 
+import asyncio
+from functools import partial
 from datetime import datetime
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List, Tuple
+import orjson
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from sqlalchemy import select
+from sqlalchemy import select, func
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.dependencies import get_db, CurrentUser
+from app.config import settings
+from app.core.database import async_session_maker
+from app.dependencies import (
+    get_db,
+    get_orchestrator,
+    get_categorize_agent,
+    get_news_agent,
+    CurrentUser,
+)
 from app.models.transaction import Transaction, TransactionType
 from app.core.logging import get_logger
+from app.core.redis import CacheService, get_cache_service
+from agents.orchestrators import InvestmentOrchestrator
+from agents.block_1 import CategorizeAgent
+from agents.block_2 import Block2NewsAgent
 
 
 logger = get_logger(__name__)
 
+# Caps concurrent LLM calls from this worker to stay under the provider's
+# rate limit. The agents are natively async, so no thread offloading is needed.
+_llm_sem = asyncio.Semaphore(settings.OPENAI_MAX_CONCURRENCY)
+
+# Market news is global, so a short TTL serves nearly all requests from Redis
+MARKET_NEWS_CACHE_TTL = 300
+
+# In-flight advisory runs keyed by (user_id, query, include_news), and how
+# many requests are currently waiting on each
+_inflight: Dict[Tuple[str, str, bool], asyncio.Task] = {}
+_inflight_waiters: Dict[Tuple[str, str, bool], int] = {}
+
 
 router = APIRouter(prefix="/insights", tags=["AI Insights"])
 
@@ -27,6 +55,12 @@ class InsightRequest(BaseModel):
     include_news: bool = True
 
 
+class QuestionRequest(BaseModel):
+    """Request for a free-form financial question"""
+    question: str
+    context: Optional[Dict[str, Any]] = None
+
+
 class InsightResponse(BaseModel):
     """Response from AI agents"""
     analysis: Optional[Dict[str, Any]] = None
@@ -36,11 +70,124 @@ class InsightResponse(BaseModel):
     aggregated_advice: Optional[str] = None
 
 
+# Static advisory returned when the agent pipeline fails; only the surplus and
+# news toggle are filled in per request.
+_FALLBACK_INSIGHT = InsightResponse(
+    analysis={
+        "monthly_surplus": 15000,
+        "risk_score": 60,
+        "risk_profile": "Moderate Growth",
+        "market_sentiment": "Neutral",
+        "top_trends": ["Index Funds", "Banking Sector", "Technology"]
+    },
+    growth_recommendations={"recommendations": [
+        {"type": "Stock", "name": "Nifty 50 Index Fund", "return": 12.5, "rationale": "Low cost diversification across top companies", "allocation": 30},
+        {"type": "Mutual Fund", "name": "Axis Bluechip Fund", "return": 14.8, "rationale": "Large cap stability with consistent returns", "allocation": 25},
+        {"type": "Mutual Fund", "name": "HDFC Mid-Cap Fund", "return": 18.2, "rationale": "Growth potential in quality mid-caps", "allocation": 20},
+        {"type": "Stock", "name": "IT Sector ETF", "return": 15.5, "rationale": "Exposure to technology growth story", "allocation": 15},
+        {"type": "ETF", "name": "Gold ETF", "return": 8.5, "rationale": "Safe haven and portfolio diversification", "allocation": 10},
+    ]},
+    safety_recommendations={"recommendations": [
+        {"type": "FD", "name": "SBI Fixed Deposit", "rate": 7.1, "duration": "5 Years", "safety": "High", "maturityVal": 150000},
+        {"type": "RD", "name": "HDFC Recurring Deposit", "rate": 7.0, "duration": "12 Months", "safety": "High", "maturityVal": 125000},
+        {"type": "Gov Scheme", "name": "Public Provident Fund", "rate": 7.1, "duration": "15 Years", "safety": "Very High", "maturityVal": "Tax Free"},
+        {"type": "PSU Bond", "name": "REC Bond", "rate": 7.5, "duration": "3 Years", "safety": "High", "maturityVal": 120000},
+        {"type": "Gov Scheme", "name": "Senior Citizen Savings", "rate": 8.2, "duration": "5 Years", "safety": "Very High", "maturityVal": 165000},
+    ]},
+    market_news={"news": "Markets showing steady growth with positive momentum in banking and IT sectors."},
+    aggregated_advice="Consider a balanced portfolio: 60% equity (growth-oriented) + 40% fixed income (safety and stability)"
+)
+
+
+def _fallback_insight(savings: Any, include_news: bool) -> InsightResponse:
+    """Copy the static fallback with the user's surplus filled in."""
+    fallback_savings = float(savings or 0)
+    return _FALLBACK_INSIGHT.model_copy(
+        update={
+            "analysis": {
+                **_FALLBACK_INSIGHT.analysis,
+                "monthly_surplus": fallback_savings if fallback_savings > 0 else 15000,
+            },
+            "market_news": _FALLBACK_INSIGHT.market_news if include_news else None,
+        }
+    )
+
+
+# Static fallback articles; only the date is filled in per response
+_FALLBACK_NEWS_TEMPLATE: Tuple[Dict[str, Any], ...] = (
+    {
+        "id": 1,
+        "title": "Markets Rally on Strong Economic Data",
+        "summary": "Indian stock markets closed higher as positive economic indicators boosted investor sentiment. Nifty 50 gained 1.2% while Sensex rose 400 points.",
+        "source": "Economic Times",
+        "sentiment": "Positive",
+        "impact": "Good time for equity investments",
+        "category": "market",
+        "imageUrl": "https://images.unsplash.com/photo-1611974765270-ca1258634369?w=800",
+        "url": "https://economictimes.indiatimes.com/markets"
+    },
+    {
+        "id": 2,
+        "title": "RBI Holds Interest Rates Steady",
+        "summary": "Reserve Bank of India maintains repo rate at 6.5% for the sixth consecutive time, focusing on inflation management.",
+        "source": "Business Standard",
+        "sentiment": "Neutral",
+        "impact": "Loan EMIs remain unchanged",
+        "category": "economy",
+        "imageUrl": "https://images.unsplash.com/photo-1642543492481-44e81e3914a7?w=800",
+        "url": "https://www.business-standard.com/economy"
+    },
+    {
+        "id": 3,
+        "title": "IT Sector Shows Strong Q3 Performance",
+        "summary": "Major IT companies report better-than-expected quarterly earnings.",
+        "source": "MoneyControl",
+        "sentiment": "Positive",
+        "impact": "IT stocks may see upward momentum",
+        "category": "tech",
+        "imageUrl": "https://images.unsplash.com/photo-1518770660439-4636190af475?w=800",
+        "url": "https://www.moneycontrol.com/markets"
+    },
+)
+
+# Used when the news agent itself errors out
+_ERROR_NEWS_TEMPLATE: Tuple[Dict[str, Any], ...] = (
+    {
+        "id": 1,
+        "title": "Markets Show Positive Momentum",
+        "summary": "Indian equity markets continue their upward trajectory.",
+        "source": "FinBuddy AI",
+        "sentiment": "Positive",
+        "impact": "Good environment for investments",
+        "category": "market",
+        "imageUrl": "https://images.unsplash.com/photo-1611974765270-ca1258634369?w=800",
+        "url": "https://economictimes.indiatimes.com/markets"
+    },
+)
+
+
+def _fallback_news(template: Tuple[Dict[str, Any], ...], now_iso: str) -> List[Dict[str, Any]]:
+    """Stamp the fallback articles with the current date."""
+    return [{**item, "date": now_iso} for item in template]
+
+
+_ADVISORY_PROMPT_TMPL = (
+    "User has monthly income of ₹{monthly_income:,.0f}, "
+    "recent savings of ₹{savings:,.0f}, "
+    "and a {risk_profile} risk profile."
+)
+
+
+def _build_default_prompt(context: Dict[str, Any]) -> str:
+    """Build the advisory prompt used when the caller sends no query."""
+    return _ADVISORY_PROMPT_TMPL.format_map(context)
+
+
 @router.post("/investment-advisory", response_model=InsightResponse)
 async def get_investment_advisory(
     request: InsightRequest,
     current_user: CurrentUser,
-    db: AsyncSession = Depends(get_db)
+    orchestrator: InvestmentOrchestrator = Depends(get_orchestrator)
 ):
     """
     Get comprehensive investment advisory using AI agents.
@@ -50,7 +197,55 @@ async def get_investment_advisory(
     2. News Agent - Gets current market trends
     3. Stock Agent - Top 10 growth recommendations (Stocks/MFs)
     4. Investment Agent - Top 10 safety recommendations (FDs/RDs)
+    
+    Identical requests from the same user that arrive while one is already
+    running share its result instead of starting another agent run. The run
+    is only cancelled once every request waiting on it has gone away.
     """
+    key = (current_user.id, request.query or "", request.include_news)
+    task = _inflight.get(key)
+    if task is None:
+        task = asyncio.create_task(_run_advisory_task(request, current_user, orchestrator))
+        _inflight[key] = task
+        _inflight_waiters[key] = 0
+        task.add_done_callback(partial(_forget_advisory, key))
+    
+    _inflight_waiters[key] += 1
+    try:
+        return await asyncio.shield(task)
+    finally:
+        if not task.done():
+            _inflight_waiters[key] -= 1
+            if not _inflight_waiters[key]:
+                # Last waiter disconnected; nobody wants the result
+                _forget_advisory(key, task)
+                task.cancel()
+
+
+def _forget_advisory(key: Tuple[str, str, bool], task: asyncio.Task) -> None:
+    """Stop coalescing new requests onto ``task``."""
+    if _inflight.get(key) is task:
+        del _inflight[key]
+        del _inflight_waiters[key]
+
+
+async def _run_advisory_task(
+    request: InsightRequest,
+    current_user,
+    orchestrator: InvestmentOrchestrator
+) -> InsightResponse:
+    """Run the advisory on its own session so it can outlive the request that started it."""
+    async with async_session_maker() as db:
+        return await _run_advisory(request, current_user, db, orchestrator)
+
+
+async def _run_advisory(
+    request: InsightRequest,
+    current_user,
+    db: AsyncSession,
+    orchestrator: InvestmentOrchestrator
+) -> InsightResponse:
+    """Run the advisory workflow for a single (coalesced) request."""
     context: Dict[str, Any] = {
         "user_id": current_user.id,
         "monthly_income": current_user.monthly_income or 0,
@@ -61,19 +256,28 @@ async def get_investment_advisory(
         "risk_profile": (getattr(current_user, "risk_tolerance", None) or "moderate"),
     }
 
+    # Market trends don't depend on the user's transactions, so start the
+    # news step now and let it overlap with the database work below.
+    news_task = asyncio.create_task(orchestrator.run_market_trends(dict(context)))
+
     try:
-        # Get user's transaction data for context
-        result = await db.execute(
-            select(Transaction)
+        # Totals per transaction type over the user's 100 most recent transactions
+        recent = (
+            select(Transaction.transaction_type, Transaction.amount)
             .where(Transaction.user_id == current_user.id)
             .order_by(Transaction.transaction_date.desc())
             .limit(100)
+            .subquery()
         )
-        transactions = result.scalars().all()
+        result = await db.execute(
+            select(recent.c.transaction_type, func.sum(recent.c.amount), func.count())
+            .group_by(recent.c.transaction_type)
+        )
+        totals = {ttype: (amount or 0, count) for ttype, amount, count in result.all()}
         
-        # Build context from transactions
-        income = sum(t.amount for t in transactions if t.transaction_type == TransactionType.CREDIT)
-        expenses = sum(t.amount for t in transactions if t.transaction_type == TransactionType.DEBIT)
+        income = totals.get(TransactionType.CREDIT, (0, 0))[0]
+        expenses = totals.get(TransactionType.DEBIT, (0, 0))[0]
+        num_transactions = sum(count for _, count in totals.values())
         savings = income - expenses
         
         context.update(
@@ -82,21 +286,21 @@ async def get_investment_advisory(
                 "total_income": income,
                 "total_expenses": expenses,
                 "savings": savings,
-                "num_transactions": len(transactions),
+                "num_transactions": num_transactions,
             }
         )
         
-        user_input = request.query or f"""
-        User has monthly income of ₹{context['monthly_income']:,.0f}, 
-        recent savings of ₹{savings:,.0f}, 
-        and a {context['risk_profile']} risk profile.
-        """
+        # New users with no history and no question would only get the
+        # default advice, so skip the agent round-trip entirely.
+        if not num_transactions and not request.query:
+            return _fallback_insight(0, request.include_news)
         
-        # Import and run the InvestmentOrchestrator
-        from agents.orchestrators import InvestmentOrchestrator
+        user_input = request.query if request.query else _build_default_prompt(context)
         
-        orchestrator = InvestmentOrchestrator()
-        result = await orchestrator.run_comprehensive_advisory(user_input, context)
+        # Run the shared InvestmentOrchestrator
+        result = await orchestrator.run_comprehensive_advisory_parallel(
+            user_input, context, news_task=news_task
+        )
         
         # Format analysis data for frontend
         # Access results from the aggregated orchestrator response
@@ -158,77 +362,60 @@ async def get_investment_advisory(
             aggregated_advice=aggregated
         )
         
-    except Exception as e:
+    except Exception:
         # Fallback with simulated response if agents fail
-        logger.error("Agent error", error=str(e))
-        fallback_savings = float(context.get("savings", 0) or 0)
-        return InsightResponse(
-            analysis={
-                "monthly_surplus": fallback_savings if fallback_savings > 0 else 15000,
-                "risk_score": 60,
-                "risk_profile": "Moderate Growth",
-                "market_sentiment": "Neutral",
-                "top_trends": ["Index Funds", "Banking Sector", "Technology"]
-            },
-            growth_recommendations={"recommendations": [
-                {"type": "Stock", "name": "Nifty 50 Index Fund", "return": 12.5, "rationale": "Low cost diversification across top companies", "allocation": 30},
-                {"type": "Mutual Fund", "name": "Axis Bluechip Fund", "return": 14.8, "rationale": "Large cap stability with consistent returns", "allocation": 25},
-                {"type": "Mutual Fund", "name": "HDFC Mid-Cap Fund", "return": 18.2, "rationale": "Growth potential in quality mid-caps", "allocation": 20},
-                {"type": "Stock", "name": "IT Sector ETF", "return": 15.5, "rationale": "Exposure to technology growth story", "allocation": 15},
-                {"type": "ETF", "name": "Gold ETF", "return": 8.5, "rationale": "Safe haven and portfolio diversification", "allocation": 10},
-            ]},
-            safety_recommendations={"recommendations": [
-                {"type": "FD", "name": "SBI Fixed Deposit", "rate": 7.1, "duration": "5 Years", "safety": "High", "maturityVal": 150000},
-                {"type": "RD", "name": "HDFC Recurring Deposit", "rate": 7.0, "duration": "12 Months", "safety": "High", "maturityVal": 125000},
-                {"type": "Gov Scheme", "name": "Public Provident Fund", "rate": 7.1, "duration": "15 Years", "safety": "Very High", "maturityVal": "Tax Free"},
-                {"type": "PSU Bond", "name": "REC Bond", "rate": 7.5, "duration": "3 Years", "safety": "High", "maturityVal": 120000},
-                {"type": "Gov Scheme", "name": "Senior Citizen Savings", "rate": 8.2, "duration": "5 Years", "safety": "Very High", "maturityVal": 165000},
-            ]},
-            market_news={"news": "Markets showing steady growth with positive momentum in banking and IT sectors."} if request.include_news else None,
-            aggregated_advice="Consider a balanced portfolio: 60% equity (growth-oriented) + 40% fixed income (safety and stability)"
-        )
+        logger.error("Agent error", exc_info=True)
+        return _fallback_insight(context.get("savings", 0), request.include_news)
+    finally:
+        # Every exit, including cancellation of the coalesced run, stops the
+        # news call if the workflow didn't consume it
+        if not news_task.done():
+            news_task.cancel()
 
 
 @router.get("/spending-analysis")
 async def get_spending_analysis(
     current_user: CurrentUser,
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_db),
+    agent: CategorizeAgent = Depends(get_categorize_agent)
 ):
     """
     Get AI-powered spending analysis.
     """
-    # Get transactions
-    result = await db.execute(
-        select(Transaction)
+    # Spending per category over the user's 200 most recent transactions
+    recent = (
+        select(Transaction.transaction_type, Transaction.category, Transaction.amount)
         .where(Transaction.user_id == current_user.id)
         .order_by(Transaction.transaction_date.desc())
         .limit(200)
+        .subquery()
     )
-    transactions = result.scalars().all()
+    result = await db.execute(
+        select(recent.c.transaction_type, recent.c.category, func.sum(recent.c.amount))
+        .group_by(recent.c.transaction_type, recent.c.category)
+    )
+    rows = result.all()
     
-    if not transactions:
+    if not rows:
         return {
             "analysis": "No transactions found. Start adding transactions to get personalized insights.",
             "categories": {},
             "recommendations": []
         }
     
-    # Calculate spending by category
-    spending_by_category = {}
-    for t in transactions:
-        if t.transaction_type == TransactionType.DEBIT:
-            cat = t.category.value if t.category else "uncategorized"
-            spending_by_category[cat] = spending_by_category.get(cat, 0) + t.amount
+    spending_by_category = {
+        (cat.value if cat else "uncategorized"): float(amount)
+        for ttype, cat, amount in rows
+        if ttype == TransactionType.DEBIT
+    }
     
     total_spending = sum(spending_by_category.values())
     
     # Generate insights using agent (or fallback)
     try:
-        from agents.block_1 import CategorizeAgent
-        agent = CategorizeAgent()
-        
         analysis_input = f"Analyze this spending pattern: {spending_by_category}"
-        result = await agent.run(analysis_input)
+        async with _llm_sem:
+            result = await agent.run(analysis_input)
         
         return {
             "analysis": result.get("output", ""),
@@ -254,26 +441,36 @@ async def get_spending_analysis(
 @router.get("/market-news")
 async def get_market_news(
     current_user: CurrentUser,
-    limit: int = 10
+    limit: int = 10,
+    agent: Block2NewsAgent = Depends(get_news_agent),
+    cache: CacheService = Depends(get_cache_service)
 ):
     """
     Get AI-curated market news with sentiment analysis using web search.
+    
+    Market news is the same for every user, so web-search results are cached
+    in Redis for a few minutes.
     """
+    cache_key = f"market_news:{limit}"
+    try:
+        cached = await cache.get_json(cache_key)
+        if cached:
+            return cached
+    except Exception:
+        logger.warning("Market news cache unavailable", exc_info=True)
+    
     try:
-        from agents.block_2 import Block2NewsAgent
-        
-        # Create news agent and fetch real news
-        agent = Block2NewsAgent()
-        
         # Fetch news using web search
-        news_data = await agent.fetch_news(
-            query="Indian stock market financial news", 
-            max_results=limit
-        )
+        async with _llm_sem:
+            news_data = await agent.fetch_news(
+                query="Indian stock market financial news", 
+                max_results=limit
+            )
         
         # Parse news results
         news_items = []
         results = news_data.get("results", [])
+        now_iso = datetime.utcnow().isoformat()
         
         for idx, article in enumerate(results[:limit], 1):
             news_items.append({
@@ -284,77 +481,39 @@ async def get_market_news(
                 "sentiment": article.get("sentiment", "Neutral").title(),
                 "impact": "Review your portfolio based on this news.",
                 "category": "market",
-                "date": article.get("published_at", datetime.utcnow().isoformat()),
+                "date": article.get("published_at", now_iso),
                 "imageUrl": article.get("imageUrl", "https://images.unsplash.com/photo-1611974765270-ca1258634369?w=800"),
                 "url": article.get("url", "")
             })
         
+        # Only real search results are cached; the fallback is retried next time
+        cacheable = bool(news_items)
+        
         # If no news from web search, use fallback
         if not news_items:
-            news_items = [
-                {
-                    "id": 1,
-                    "title": "Markets Rally on Strong Economic Data",
-                    "summary": "Indian stock markets closed higher as positive economic indicators boosted investor sentiment. Nifty 50 gained 1.2% while Sensex rose 400 points.",
-                    "source": "Economic Times",
-                    "sentiment": "Positive",
-                    "impact": "Good time for equity investments",
-                    "category": "market",
-                    "date": datetime.utcnow().isoformat(),
-                    "imageUrl": "https://images.unsplash.com/photo-1611974765270-ca1258634369?w=800",
-                    "url": "https://economictimes.indiatimes.com/markets"
-                },
-                {
-                    "id": 2,
-                    "title": "RBI Holds Interest Rates Steady",
-                    "summary": "Reserve Bank of India maintains repo rate at 6.5% for the sixth consecutive time, focusing on inflation management.",
-                    "source": "Business Standard",
-                    "sentiment": "Neutral",
-                    "impact": "Loan EMIs remain unchanged",
-                    "category": "economy",
-                    "date": datetime.utcnow().isoformat(),
-                    "imageUrl": "https://images.unsplash.com/photo-1642543492481-44e81e3914a7?w=800",
-                    "url": "https://www.business-standard.com/economy"
-                },
-                {
-                    "id": 3,
-                    "title": "IT Sector Shows Strong Q3 Performance",
-                    "summary": "Major IT companies report better-than-expected quarterly earnings.",
-                    "source": "MoneyControl",
-                    "sentiment": "Positive",
-                    "impact": "IT stocks may see upward momentum",
-                    "category": "tech",
-                    "date": datetime.utcnow().isoformat(),
-                    "imageUrl": "https://images.unsplash.com/photo-1518770660439-4636190af475?w=800",
-                    "url": "https://www.moneycontrol.com/markets"
-                }
-            ]
+            news_items = _fallback_news(_FALLBACK_NEWS_TEMPLATE, now_iso)
         
-        return {
+        payload = {
             "news": news_items,
             "sentiment": "Positive",
             "trending_topics": ["Banking Sector", "IT Earnings", "Market Rally", "Economic Growth"]
         }
         
-    except Exception as e:
-        logger.error("News agent error", error=str(e))
+        if cacheable:
+            try:
+                await cache.set_json(cache_key, payload, ttl=MARKET_NEWS_CACHE_TTL)
+            except Exception:
+                logger.warning("Market news cache unavailable", exc_info=True)
+        
+        return payload
+        
+    except Exception:
+        logger.error("News agent error", exc_info=True)
+        now_iso = datetime.utcnow().isoformat()
         
         # Fallback with curated news
         return {
-            "news": [
-                {
-                    "id": 1,
-                    "title": "Markets Show Positive Momentum",
-                    "summary": "Indian equity markets continue their upward trajectory.",
-                    "source": "FinBuddy AI",
-                    "sentiment": "Positive",
-                    "impact": "Good environment for investments",
-                    "category": "market",
-                    "date": datetime.utcnow().isoformat(),
-                    "imageUrl": "https://images.unsplash.com/photo-1611974765270-ca1258634369?w=800",
-                    "url": "https://economictimes.indiatimes.com/markets"
-                }
-            ],
+            "news": _fallback_news(_ERROR_NEWS_TEMPLATE, now_iso),
             "sentiment": "Positive",
             "trending_topics": ["Banking", "Technology", "Market Rally"]
         }
@@ -362,23 +521,51 @@ async def get_market_news(
 
 @router.post("/ask")
 async def ask_financial_question(
-    question: str,
+    payload: QuestionRequest,
     current_user: CurrentUser,
-    db: AsyncSession = Depends(get_db)
+    stream: bool = True,
+    db: AsyncSession = Depends(get_db),
+    orchestrator: InvestmentOrchestrator = Depends(get_orchestrator)
 ):
     """
     Ask any financial question to the AI assistant.
+    
+    Streams the answer as Server-Sent Events as it is generated.
+    Pass ``?stream=false`` to get a single JSON response instead.
     """
-    try:
-        from agents.orchestrators import InvestmentOrchestrator
-        
-        orchestrator = InvestmentOrchestrator()
-        result = await orchestrator.route_request(
-            intent="general_query",
-            user_input=question,
-            context={"user_id": current_user.id}
-        )
+    context = {**(payload.context or {}), "user_id": current_user.id}
+    
+    if not stream:
+        try:
+            async with _llm_sem:
+                result = await orchestrator.route_request(
+                    intent="general_query",
+                    user_input=payload.question,
+                    context=context
+                )
+            
+            answer = result.get("combined_output") or result.get("output")
+            return {"answer": answer or "I couldn't process that question."}
+        except Exception as e:
+            return {"answer": f"I'm having trouble connecting to the AI service. Please try again later."}
+    
+    async def generate():
+        try:
+            async with _llm_sem:
+                async for chunk in orchestrator.astream_question(payload.question, context):
+                    yield b"data: " + orjson.dumps(chunk) + b"\n\n"
+        except Exception:
+            logger.error("Streaming answer failed", exc_info=True)
+            error = {
+                "type": "error",
+                "agent_name": orchestrator.name,
+                "content": "I'm having trouble connecting to the AI service. Please try again later."
+            }
+            yield b"data: " + orjson.dumps(error) + b"\n\n"
         
-        return {"answer": result.get("output", "I couldn't process that question.")}
-    except Exception as e:
-        return {"answer": f"I'm having trouble connecting to the AI service. Please try again later."}
+        yield b"data: [DONE]\n\n"
+    
+    return StreamingResponse(
+        generate(),
+        media_type="text/event-stream"
+    )
@@ -3,14 +3,16 @@ Authentication API endpoints
 """
 
 from datetime import datetime
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy import select
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status
+from sqlalchemy import select, exists, update
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.database import async_session_maker
 from app.dependencies import get_db, CurrentUser
 from app.core.security import (
-    get_password_hash,
-    verify_password,
+    hash_password_async,
+    verify_password_async,
     create_tokens,
     verify_token
 )
@@ -35,10 +37,10 @@ async def register(
 ):
     """Register a new user."""
     # Check if email exists
-    result = await db.execute(
-        select(User).where(User.email == user_data.email)
-    )
-    if result.scalar_one_or_none():
+    email_taken = (
+        await db.execute(select(exists().where(User.email == user_data.email)))
+    ).scalar()
+    if email_taken:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Email already registered"
@@ -47,21 +49,41 @@ async def register(
     # Create user
     user = User(
         email=user_data.email,
-        hashed_password=get_password_hash(user_data.password),
+        hashed_password=await hash_password_async(user_data.password),
         full_name=user_data.full_name,
         phone=user_data.phone
     )
     
     db.add(user)
-    await db.commit()
+    try:
+        await db.commit()
+    except IntegrityError:
+        # A concurrent registration won the race on the unique email index
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Email already registered"
+        )
     await db.refresh(user)
     
     return user
 
 
+async def _update_last_login(user_id: str) -> None:
+    """Record the login time after the response has been sent."""
+    async with async_session_maker() as session:
+        await session.execute(
+            update(User)
+            .where(User.id == user_id)
+            .values(last_login=datetime.utcnow())
+        )
+        await session.commit()
+
+
 @router.post("/login", response_model=TokenResponse)
 async def login(
     credentials: UserLogin,
+    background_tasks: BackgroundTasks,
     db: AsyncSession = Depends(get_db)
 ):
     """Authenticate user and return tokens."""
@@ -70,7 +92,7 @@ async def login(
     )
     user = result.scalar_one_or_none()
     
-    if not user or not verify_password(credentials.password, user.hashed_password):
+    if not user or not await verify_password_async(credentials.password, user.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password"
@@ -82,9 +104,8 @@ async def login(
             detail="Account is inactive"
         )
     
-    # Update last login
-    user.last_login = datetime.utcnow()
-    await db.commit()
+    # Update last login off the response path
+    background_tasks.add_task(_update_last_login, user.id)
     
     # Create tokens
     tokens = create_tokens(user.id, user.email)
@@ -110,10 +131,10 @@ async def refresh_token(
     email = payload.get("email")
     
     # Verify user still exists and is active
-    result = await db.execute(select(User).where(User.id == user_id))
-    user = result.scalar_one_or_none()
+    result = await db.execute(select(User.is_active).where(User.id == user_id))
+    is_active = result.scalar_one_or_none()
     
-    if not user or not user.is_active:
+    if not is_active:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="User not found or inactive"
@@ -153,13 +174,13 @@ async def change_password(
     db: AsyncSession = Depends(get_db)
 ):
     """Change user password."""
-    if not verify_password(password_data.current_password, current_user.hashed_password):
+    if not await verify_password_async(password_data.current_password, current_user.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Incorrect current password"
         )
     
-    current_user.hashed_password = get_password_hash(password_data.new_password)
+    current_user.hashed_password = await hash_password_async(password_data.new_password)
     await db.commit()
     
     return {"message": "Password updated successfully"}
@@ -2,13 +2,16 @@
 Cash reconciliation and quick-add endpoints
 """
 
+import asyncio
 from datetime import datetime
 from typing import List, Optional
 
 from fastapi import APIRouter, Depends, HTTPException, status
 from pydantic import BaseModel
+from sqlalchemy import select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.database import async_session_maker
 from app.dependencies import get_db, CurrentUser
 from app.models.notification import Notification
 from app.models.transaction import Transaction, TransactionType, TransactionCategory, TransactionSource
@@ -16,6 +19,14 @@ from app.services.cash_reconciliation_service import cash_reconciliation_service
 
 router = APIRouter(prefix="/cash-check", tags=["Cash Check"])
 
+# Quick-add subcategory -> transaction category
+_SUBCAT_TO_CATEGORY = {
+    **{kw: TransactionCategory.ESSENTIALS for kw in ("groceries", "food", "dining", "restaurant", "cafe")},
+    **{kw: TransactionCategory.NEEDS for kw in ("transport", "fuel", "parking", "taxi", "uber")},
+    **{kw: TransactionCategory.SPENDS for kw in ("shopping", "clothing", "entertainment", "movie", "games")},
+    **{kw: TransactionCategory.BILLS for kw in ("bills", "utilities", "rent", "electricity", "water")},
+}
+
 
 class CashCheckResponse(BaseModel):
     """Response with cash position and suggestions."""
@@ -58,21 +69,24 @@ async def get_cash_check_summary(
     - Probabilistic suggestions for quick expense entry
     """
     
-    # Compute cash position
-    position = await cash_reconciliation_service.compute_cash_position(
-        db=db,
-        user_id=current_user.id,
-        lookback_days=30,
-        min_days_since_withdrawal=3,
-    )
-    
-    # Generate suggestions
-    suggestions_objs = await cash_reconciliation_service.suggest_likely_cash_expenses(
-        db=db,
-        user_id=current_user.id,
-        history_days=90,
-        limit=4,
-    )
+    # Compute cash position and generate suggestions concurrently. An
+    # AsyncSession can't run two queries at once, so the suggestions query
+    # gets its own session.
+    async with async_session_maker() as suggestions_db:
+        position, suggestions_objs = await asyncio.gather(
+            cash_reconciliation_service.compute_cash_position(
+                db=db,
+                user_id=current_user.id,
+                lookback_days=30,
+                min_days_since_withdrawal=3,
+            ),
+            cash_reconciliation_service.suggest_likely_cash_expenses(
+                db=suggestions_db,
+                user_id=current_user.id,
+                history_days=90,
+                limit=4,
+            ),
+        )
     
     suggestions = [
         {
@@ -105,16 +119,7 @@ async def quick_add_cash_expense(
     
     # Intelligently categorize based on subcategory
     subcategory_lower = request.subcategory.lower()
-    if subcategory_lower in ['groceries', 'food', 'dining', 'restaurant', 'cafe']:
-        category = TransactionCategory.ESSENTIALS
-    elif subcategory_lower in ['transport', 'fuel', 'parking', 'taxi', 'uber']:
-        category = TransactionCategory.NEEDS
-    elif subcategory_lower in ['shopping', 'clothing', 'entertainment', 'movie', 'games']:
-        category = TransactionCategory.SPENDS
-    elif subcategory_lower in ['bills', 'utilities', 'rent', 'electricity', 'water']:
-        category = TransactionCategory.BILLS
-    else:
-        category = TransactionCategory.OTHER
+    category = _SUBCAT_TO_CATEGORY.get(subcategory_lower, TransactionCategory.OTHER)
     
     transaction = Transaction(
         user_id=current_user.id,
@@ -167,8 +172,6 @@ async def get_cash_check_notifications(
     unread_only: bool = True,
 ):
     """Get cash-check related notifications."""
-    from sqlalchemy import select
-    
     query = select(Notification).where(Notification.user_id == current_user.id)
     
     if unread_only:
@@ -191,24 +194,20 @@ async def mark_notification_read(
     db: AsyncSession = Depends(get_db),
 ):
     """Mark a notification as read."""
-    from sqlalchemy import select
-    
     result = await db.execute(
-        select(Notification)
+        update(Notification)
         .where(Notification.id == notification_id)
         .where(Notification.user_id == current_user.id)
+        .values(is_read=True, read_at=datetime.utcnow())
+        .returning(Notification.id)
     )
-    notification = result.scalar_one_or_none()
     
-    if not notification:
+    if result.first() is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Notification not found",
         )
     
-    notification.is_read = True
-    notification.read_at = datetime.utcnow()
-    
     await db.commit()
     
     return {"success": True}
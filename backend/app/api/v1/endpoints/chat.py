@@ -2,16 +2,31 @@
 Chat API endpoints for agent interactions
 """
 
+import base64
+import hashlib
+import re
+import uuid
+from dataclasses import dataclass
 from datetime import datetime
-from typing import Optional, List
-from fastapi import APIRouter, Depends, HTTPException, status
-from fastapi.responses import StreamingResponse
-from sqlalchemy import select
+from functools import lru_cache
+from typing import AsyncIterator, Dict, Optional, List, Tuple
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from sqlalchemy import and_, delete, insert, select, func, tuple_
 from sqlalchemy.ext.asyncio import AsyncSession
-import json
-import asyncio
+from sqlalchemy.orm import raiseload
+from sqlalchemy.orm.attributes import flag_modified
+import orjson
+import ormsgpack
 
-from app.dependencies import get_db, CurrentUser
+from langchain_openai import ChatOpenAI
+from langchain_core.messages import SystemMessage, HumanMessage
+
+from app.config import settings
+from app.core.database import async_session_maker
+from app.dependencies import get_db, get_chat_orchestrators, CurrentUser
+from app.core.logging import get_logger
+from app.core.redis import CacheService, get_cache_service
 from app.models.conversation import Conversation, Message, MessageRole
 from app.schemas.agent_response import (
     ChatRequest,
@@ -21,51 +36,195 @@ from app.schemas.agent_response import (
     ConversationList,
     MessageResponse
 )
+from agents.base_agent import BaseAgent
+
+
+logger = get_logger(__name__)
 
 
 router = APIRouter(prefix="/chat", tags=["Chat"])
 
 
+# General questions don't depend on the user, so short repeated ones
+# (greetings, FAQs) are answered from Redis for a while
+GENERAL_ANSWER_CACHE_TTL = 600
+GENERAL_ANSWER_CACHE_MAX_LEN = 128
+
+# Opt-in binary encoding for the list endpoints (see _negotiated_response)
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+
+# Rows fetched per round-trip when streaming a conversation export
+EXPORT_BATCH_SIZE = 500
+
+# Keyword routing for process_with_agents, in priority order
+_INVESTMENT_KEYWORDS = ("invest", "stock", "mutual fund", "sip", "portfolio", "market", "nifty", "sensex")
+_PRODUCTS_KEYWORDS = ("tax", "itr", "credit card", "loan", "emi")
+_MONEY_KEYWORDS = ("spend", "expense", "transaction", "budget", "money", "saving", "category")
+_ROUTE_KEYWORDS = (
+    ("investment", _INVESTMENT_KEYWORDS),
+    ("products", _PRODUCTS_KEYWORDS),
+    ("money", _MONEY_KEYWORDS),
+)
+_ROUTE_PRIORITY = {route: i for i, (route, _) in enumerate(_ROUTE_KEYWORDS)}
+
+# One pass over the message finds every keyword that starts a word
+# ("stocks" and "investing" match, "gossip" and "premium" don't). The
+# lookahead lets matches overlap so no keyword hides another.
+_ROUTE_RE = re.compile(
+    r"(?=\b(?:"
+    + "|".join(
+        f"(?P<{route}>{'|'.join(map(re.escape, words))})"
+        for route, words in _ROUTE_KEYWORDS
+    )
+    + "))"
+)
+
+
+@dataclass(frozen=True)
+class _RouteSpec:
+    """How process_with_agents calls and labels one orchestrator route."""
+    intent: str
+    orchestrator_name: str
+    agent_name: str
+    default_reply: str
+    suggestions: Tuple[str, ...]
+
+
+_ROUTE_SPECS: Dict[str, _RouteSpec] = {
+    # Investment related - Orchestrator 2
+    "investment": _RouteSpec(
+        intent="investment_query",
+        orchestrator_name="orchestrator_2",
+        agent_name="investment_agent",
+        default_reply="I can help you with investment advice. What specific investment topic would you like to explore?",
+        suggestions=("View my portfolio", "Get stock recommendations", "Analyze market trends"),
+    ),
+    # Financial products - Orchestrator 3
+    "products": _RouteSpec(
+        intent="financial_products",
+        orchestrator_name="orchestrator_3",
+        agent_name="financial_products_agent",
+        default_reply="I can help you with tax planning, credit cards, and loans. What would you like to know?",
+        suggestions=("Calculate my income tax", "Compare credit cards", "Check loan eligibility"),
+    ),
+    # Spending/Money management - Orchestrator 1
+    "money": _RouteSpec(
+        intent="spending_analysis",
+        orchestrator_name="orchestrator_1",
+        agent_name="money_growth_agent",
+        default_reply="I can help you analyze your spending and manage your budget. What would you like to know?",
+        suggestions=("Show spending by category", "Compare with last month", "Set a budget alert"),
+    ),
+}
+
+_GENERAL_SUGGESTIONS = ("Show my spending summary", "Analyze my investments", "Calculate my tax")
+_FALLBACK_SUGGESTIONS = ("Show my spending summary", "Analyze my portfolio", "Calculate my tax")
+
+_GENERAL_SYSTEM_PROMPT = """You are FinBuddy, an AI-powered financial assistant for Indian users. 
+            You help with:
+            - Money management (spending analysis, budgeting, categorization)
+            - Investment advice (stocks, mutual funds, SIPs on NSE/BSE)
+            - Financial products (credit cards, loans, tax planning)
+            
+            Be helpful, concise, and provide actionable advice. Use Indian Rupees (₹) for all amounts.
+            Format your response with clear sections and bullet points when appropriate."""
+
+_FALLBACK_MESSAGE = "I'm your AI financial assistant. I can help you with:\n\n💰 **Money Management** - Track spending, budgets, categorize transactions\n📈 **Investments** - Portfolio analysis, stock research (NSE/BSE), SIP recommendations\n🏦 **Financial Products** - Credit cards, loans, tax planning (India)\n\nWhat would you like to know? Please try asking a specific question."
+
+
+def _message_count():
+    """Correlated COUNT of a conversation's messages, for use in a Conversation select."""
+    return (
+        select(func.count(Message.id))
+        .where(Message.conversation_id == Conversation.id)
+        .correlate(Conversation)
+        .scalar_subquery()
+    )
+
+
+def _encode_cursor(message: Message) -> str:
+    """Opaque page cursor for the position just after a message."""
+    raw = f"{message.created_at.isoformat()}|{message.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def _decode_cursor(cursor: str) -> Tuple[datetime, str]:
+    """Decode a cursor from _encode_cursor into (created_at, id)."""
+    try:
+        created_at, message_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|", 1)
+        return datetime.fromisoformat(created_at), message_id
+    except (ValueError, UnicodeDecodeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+
+
+def _negotiated_response(request: Request, content, headers: Optional[dict] = None) -> Response:
+    """JSON by default; MessagePack for clients that send Accept: application/msgpack."""
+    if MSGPACK_MEDIA_TYPE in request.headers.get("accept", ""):
+        return Response(ormsgpack.packb(content), media_type=MSGPACK_MEDIA_TYPE, headers=headers)
+    return ORJSONResponse(content, headers=headers)
+
+
+def _message_dict(message: Message) -> dict:
+    """Serialize a message row to the MessageResponse shape."""
+    return {
+        "id": message.id,
+        "role": message.role.value,
+        "content": message.content,
+        "agent_name": message.agent_name,
+        "orchestrator": message.orchestrator,
+        "tool_calls": message.tool_calls,
+        "created_at": message.created_at
+    }
+
+
+def _conversation_dict(conversation: Conversation, message_count: int) -> dict:
+    """Serialize a conversation row to the ConversationResponse shape."""
+    return {
+        "id": conversation.id,
+        "title": conversation.title,
+        "summary": conversation.summary,
+        "active_orchestrator": conversation.active_orchestrator,
+        "active_agents": conversation.active_agents,
+        "is_active": conversation.is_active,
+        "created_at": conversation.created_at,
+        "updated_at": conversation.updated_at,
+        "message_count": message_count
+    }
+
+
+def _conversation_response(conversation: Conversation, message_count: int) -> ConversationResponse:
+    """Build the API response for a conversation row."""
+    return ConversationResponse(**_conversation_dict(conversation, message_count))
+
+
 @router.get("/conversations", response_model=ConversationList)
 async def get_conversations(
+    request: Request,
     current_user: CurrentUser,
     db: AsyncSession = Depends(get_db),
     limit: int = 20
 ):
     """Get user's conversations."""
     result = await db.execute(
-        select(Conversation)
+        select(Conversation, _message_count())
+        .options(raiseload("*"))
         .where(Conversation.user_id == current_user.id)
         .order_by(Conversation.updated_at.desc())
         .limit(limit)
     )
-    conversations = result.scalars().all()
-    
-    # Add message count
-    conversation_list = []
-    for conv in conversations:
-        result = await db.execute(
-            select(Message).where(Message.conversation_id == conv.id)
-        )
-        messages = result.scalars().all()
-        
-        conv_dict = {
-            "id": conv.id,
-            "title": conv.title,
-            "summary": conv.summary,
-            "active_orchestrator": conv.active_orchestrator,
-            "active_agents": conv.active_agents,
-            "is_active": conv.is_active,
-            "created_at": conv.created_at,
-            "updated_at": conv.updated_at,
-            "message_count": len(messages)
-        }
-        conversation_list.append(ConversationResponse(**conv_dict))
+    conversation_list = [
+        _conversation_dict(conv, message_count)
+        for conv, message_count in result.all()
+    ]
     
-    return ConversationList(
-        items=conversation_list,
-        total=len(conversation_list)
-    )
+    # Rows are already in the ConversationList shape; skip re-validation
+    return _negotiated_response(request, {
+        "items": conversation_list,
+        "total": len(conversation_list)
+    })
 
 
 @router.post("/conversations", response_model=ConversationResponse, status_code=status.HTTP_201_CREATED)
@@ -75,27 +234,20 @@ async def create_conversation(
     db: AsyncSession = Depends(get_db)
 ):
     """Create a new conversation."""
-    conversation = Conversation(
-        user_id=current_user.id,
-        title=conversation_data.title or "New Conversation",
-        context=conversation_data.context or {}
+    # INSERT ... RETURNING loads the defaulted columns in the same round-trip
+    result = await db.execute(
+        insert(Conversation)
+        .values(
+            user_id=current_user.id,
+            title=conversation_data.title or "New Conversation",
+            context=conversation_data.context or {}
+        )
+        .returning(Conversation)
     )
-    
-    db.add(conversation)
+    conversation = result.scalar_one()
     await db.commit()
-    await db.refresh(conversation)
-    
-    return ConversationResponse(
-        id=conversation.id,
-        title=conversation.title,
-        summary=conversation.summary,
-        active_orchestrator=conversation.active_orchestrator,
-        active_agents=conversation.active_agents,
-        is_active=conversation.is_active,
-        created_at=conversation.created_at,
-        updated_at=conversation.updated_at,
-        message_count=0
-    )
+    
+    return _conversation_response(conversation, 0)
 
 
 @router.get("/conversations/{conversation_id}", response_model=ConversationResponse)
@@ -106,84 +258,139 @@ async def get_conversation(
 ):
     """Get a specific conversation."""
     result = await db.execute(
-        select(Conversation)
+        select(Conversation, _message_count())
+        .options(raiseload("*"))
         .where(Conversation.id == conversation_id)
         .where(Conversation.user_id == current_user.id)
     )
-    conversation = result.scalar_one_or_none()
+    row = result.first()
     
-    if not conversation:
+    if not row:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Conversation not found"
         )
     
-    # Get message count
+    return _conversation_response(*row)
+
+
+@router.get("/conversations/{conversation_id}/messages", response_model=List[MessageResponse])
+async def get_conversation_messages(
+    conversation_id: str,
+    request: Request,
+    current_user: CurrentUser,
+    db: AsyncSession = Depends(get_db),
+    limit: int = 50,
+    cursor: Optional[str] = None
+):
+    """
+    Get messages for a conversation, oldest first.
+    
+    Pages are keyed on (created_at, id). When more messages follow, the
+    ``X-Next-Cursor`` response header holds the cursor for the next page.
+    """
+    after = _decode_cursor(cursor) if cursor else None
+    
+    # The join on the owner verifies the conversation belongs to the user
+    # in the same round-trip as the page fetch
+    query = (
+        select(Message)
+        .options(raiseload("*"))
+        .join(
+            Conversation,
+            and_(
+                Conversation.id == Message.conversation_id,
+                Conversation.user_id == current_user.id
+            )
+        )
+        .where(Message.conversation_id == conversation_id)
+    )
+    if after is not None:
+        query = query.where(tuple_(Message.created_at, Message.id) > after)
+    
+    # One extra row tells us whether another page follows
     result = await db.execute(
-        select(Message).where(Message.conversation_id == conversation_id)
+        query
+        .order_by(Message.created_at, Message.id)
+        .limit(limit + 1)
     )
     messages = result.scalars().all()
     
-    return ConversationResponse(
-        id=conversation.id,
-        title=conversation.title,
-        summary=conversation.summary,
-        active_orchestrator=conversation.active_orchestrator,
-        active_agents=conversation.active_agents,
-        is_active=conversation.is_active,
-        created_at=conversation.created_at,
-        updated_at=conversation.updated_at,
-        message_count=len(messages)
-    )
+    # An empty page is either a foreign/missing conversation or simply
+    # no (more) messages; only then is a separate check needed
+    if not messages:
+        result = await db.execute(
+            select(Conversation.id)
+            .where(Conversation.id == conversation_id)
+            .where(Conversation.user_id == current_user.id)
+        )
+        if result.scalar_one_or_none() is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Conversation not found"
+            )
+    
+    headers = {}
+    if len(messages) > limit:
+        messages = messages[:limit]
+        headers["X-Next-Cursor"] = _encode_cursor(messages[-1])
+    
+    # Rows are already in the MessageResponse shape; skip re-validation
+    return _negotiated_response(request, [_message_dict(m) for m in messages], headers=headers)
 
 
-@router.get("/conversations/{conversation_id}/messages", response_model=List[MessageResponse])
-async def get_conversation_messages(
+@router.get("/conversations/{conversation_id}/export", response_model=List[MessageResponse])
+async def export_conversation_messages(
     conversation_id: str,
     current_user: CurrentUser,
-    db: AsyncSession = Depends(get_db),
-    limit: int = 50
+    db: AsyncSession = Depends(get_db)
 ):
-    """Get messages for a conversation."""
-    # Verify conversation belongs to user
+    """
+    Export every message of a conversation as a streamed JSON array.
+    
+    Rows are fetched from a server-side cursor and written out as they
+    arrive, so memory stays flat for very long conversations.
+    """
     result = await db.execute(
-        select(Conversation)
+        select(Conversation.id)
         .where(Conversation.id == conversation_id)
         .where(Conversation.user_id == current_user.id)
     )
-    if not result.scalar_one_or_none():
+    if result.scalar_one_or_none() is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Conversation not found"
         )
     
-    result = await db.execute(
-        select(Message)
-        .where(Message.conversation_id == conversation_id)
-        .order_by(Message.created_at)
-        .limit(limit)
-    )
-    messages = result.scalars().all()
+    async def generate():
+        # The request session is closed before a streaming body runs,
+        # so the export uses its own
+        async with async_session_maker() as session:
+            rows = await session.stream_scalars(
+                select(Message)
+                .options(raiseload("*"))
+                .where(Message.conversation_id == conversation_id)
+                .order_by(Message.created_at, Message.id)
+                .execution_options(yield_per=EXPORT_BATCH_SIZE)
+            )
+            
+            yield b"["
+            first = True
+            async for m in rows:
+                yield (b"" if first else b",") + orjson.dumps(_message_dict(m))
+                first = False
+            yield b"]"
     
-    return [
-        MessageResponse(
-            id=m.id,
-            role=m.role.value,
-            content=m.content,
-            agent_name=m.agent_name,
-            orchestrator=m.orchestrator,
-            tool_calls=m.tool_calls,
-            created_at=m.created_at
-        )
-        for m in messages
-    ]
+    return StreamingResponse(generate(), media_type="application/json")
 
 
 @router.post("/send", response_model=ChatResponse)
 async def send_message(
     chat_request: ChatRequest,
     current_user: CurrentUser,
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_db),
+    orchestrators: Dict[str, BaseAgent] = Depends(get_chat_orchestrators),
+    cache: CacheService = Depends(get_cache_service)
 ):
     """Send a message and get agent response."""
     # Get or create conversation
@@ -200,13 +407,14 @@ async def send_message(
                 detail="Conversation not found"
             )
     else:
+        # Assign the id up front; the conversation is inserted with both
+        # messages in the single commit below.
         conversation = Conversation(
+            id=str(uuid.uuid4()),
             user_id=current_user.id,
             title="New Conversation"
         )
         db.add(conversation)
-        await db.commit()
-        await db.refresh(conversation)
     
     # Save user message
     user_message = Message(
@@ -225,7 +433,9 @@ async def send_message(
         user=current_user,
         conversation=conversation,
         context=chat_request.context,
-        db=db
+        db=db,
+        orchestrators=orchestrators,
+        cache=cache
     )
     
     # Save assistant message
@@ -238,9 +448,10 @@ async def send_message(
     )
     db.add(assistant_message)
     
-    # Update conversation
-    conversation.updated_at = datetime.utcnow()
+    # Update conversation. updated_at is stamped by the database on UPDATE;
+    # flag the row so it is updated even if the orchestrator is unchanged.
     conversation.active_orchestrator = agent_response["orchestrator"]
+    flag_modified(conversation, "active_orchestrator")
     
     await db.commit()
     
@@ -258,25 +469,23 @@ async def send_message(
 async def send_message_stream(
     chat_request: ChatRequest,
     current_user: CurrentUser,
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_db),
+    orchestrators: Dict[str, BaseAgent] = Depends(get_chat_orchestrators),
+    cache: CacheService = Depends(get_cache_service)
 ):
     """Send a message and stream the agent response."""
     
     async def generate():
-        # TODO: Implement streaming with agents
-        # This will stream agent thinking, tool calls, and responses
-        
-        events = [
-            {"event": "thinking", "agent": "router", "content": "Analyzing your request..."},
-            {"event": "thinking", "agent": "money_growth", "content": "Looking at your spending patterns..."},
-            {"event": "response", "agent": "money_growth", "content": "Based on your transaction history, I can see..."}
-        ]
+        async for event in stream_with_agents(
+            message=chat_request.message,
+            user=current_user,
+            context=chat_request.context,
+            orchestrators=orchestrators,
+            cache=cache
+        ):
+            yield b"data: " + orjson.dumps(event) + b"\n\n"
         
-        for event in events:
-            yield f"data: {json.dumps(event)}\n\n"
-            await asyncio.sleep(0.5)
-        
-        yield "data: [DONE]\n\n"
+        yield b"data: [DONE]\n\n"
     
     return StreamingResponse(
         generate(),
@@ -291,20 +500,19 @@ async def delete_conversation(
     db: AsyncSession = Depends(get_db)
 ):
     """Delete a conversation."""
+    # Messages go with it via the ON DELETE CASCADE foreign key
     result = await db.execute(
-        select(Conversation)
+        delete(Conversation)
         .where(Conversation.id == conversation_id)
         .where(Conversation.user_id == current_user.id)
     )
-    conversation = result.scalar_one_or_none()
     
-    if not conversation:
+    if result.rowcount == 0:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Conversation not found"
         )
     
-    await db.delete(conversation)
     await db.commit()
 
 
@@ -313,7 +521,9 @@ async def process_with_agents(
     user,
     conversation,
     context: Optional[dict],
-    db: AsyncSession
+    db: AsyncSession,
+    orchestrators: Dict[str, BaseAgent],
+    cache: CacheService
 ) -> dict:
     """
     Process user message through the agent system.
@@ -321,111 +531,31 @@ async def process_with_agents(
     This function routes the message to the appropriate orchestrator
     based on the intent and context.
     """
-    from app.core.logging import get_logger
-    logger = get_logger(__name__)
-    
     # Simple intent detection for routing
     message_lower = message.lower()
     
     try:
-        # Import the appropriate orchestrator based on intent
-        if any(word in message_lower for word in ["invest", "stock", "mutual fund", "sip", "portfolio", "market", "nifty", "sensex"]):
-            # Investment related - use Orchestrator 2
-            from agents.orchestrators import InvestmentOrchestrator
-            orchestrator = InvestmentOrchestrator()
-            orchestrator_name = "orchestrator_2"
-            
-            result = await orchestrator.route_request(
-                intent="investment_query",
-                user_input=message,
-                context={"user_id": str(user.id), **(context or {})}
-            )
-            
-            response = result.get("output", "I can help you with investment advice. What specific investment topic would you like to explore?")
-            agent_name = "investment_agent"
-            suggestions = [
-                "View my portfolio",
-                "Get stock recommendations",
-                "Analyze market trends"
-            ]
-            
-        elif any(word in message_lower for word in ["tax", "itr", "credit card", "loan", "emi"]):
-            # Financial products - use Orchestrator 3
-            from agents.orchestrators import FinancialProductsOrchestrator
-            orchestrator = FinancialProductsOrchestrator()
-            orchestrator_name = "orchestrator_3"
-            
-            result = await orchestrator.route_request(
-                intent="financial_products",
-                user_input=message,
-                context={"user_id": str(user.id), **(context or {})}
-            )
-            
-            response = result.get("output", "I can help you with tax planning, credit cards, and loans. What would you like to know?")
-            agent_name = "financial_products_agent"
-            suggestions = [
-                "Calculate my income tax",
-                "Compare credit cards",
-                "Check loan eligibility"
-            ]
-            
-        elif any(word in message_lower for word in ["spend", "expense", "transaction", "budget", "money", "saving", "category"]):
-            # Spending/Money management - use Orchestrator 1
-            from agents.orchestrators import MoneyManagementOrchestrator
-            orchestrator = MoneyManagementOrchestrator()
-            orchestrator_name = "orchestrator_1"
-            
-            result = await orchestrator.route_request(
-                intent="spending_analysis",
+        route = _route_message(message_lower)
+        
+        if route is not None:
+            spec = _ROUTE_SPECS[route]
+            result = await orchestrators[route].route_request(
+                intent=spec.intent,
                 user_input=message,
                 context={"user_id": str(user.id), **(context or {})}
             )
             
-            response = result.get("output", "I can help you analyze your spending and manage your budget. What would you like to know?")
-            agent_name = "money_growth_agent"
-            suggestions = [
-                "Show spending by category",
-                "Compare with last month",
-                "Set a budget alert"
-            ]
+            response = result.get("output", spec.default_reply)
+            agent_name = spec.agent_name
+            orchestrator_name = spec.orchestrator_name
+            suggestions = spec.suggestions
             
         else:
             # General query - use a simple LLM response
-            from langchain_openai import ChatOpenAI
-            from app.config import settings
-            
-            llm = ChatOpenAI(
-                model=settings.OPENAI_MODEL,
-                temperature=0.7,
-                api_key=settings.OPENAI_API_KEY
-            )
-            
-            # Create a helpful financial assistant response
-            system_message = """You are FinBuddy, an AI-powered financial assistant for Indian users. 
-            You help with:
-            - Money management (spending analysis, budgeting, categorization)
-            - Investment advice (stocks, mutual funds, SIPs on NSE/BSE)
-            - Financial products (credit cards, loans, tax planning)
-            
-            Be helpful, concise, and provide actionable advice. Use Indian Rupees (₹) for all amounts.
-            Format your response with clear sections and bullet points when appropriate."""
-            
-            from langchain_core.messages import SystemMessage, HumanMessage
-            
-            messages = [
-                SystemMessage(content=system_message),
-                HumanMessage(content=message)
-            ]
-            
-            ai_response = await llm.ainvoke(messages)
-            response = ai_response.content
+            response = await _general_answer(message, cache)
             orchestrator_name = "orchestrator_1"
             agent_name = "finbuddy"
-            suggestions = [
-                "Show my spending summary",
-                "Analyze my investments",
-                "Calculate my tax"
-            ]
+            suggestions = _GENERAL_SUGGESTIONS
         
         logger.info(f"Agent response generated", agent=agent_name, orchestrator=orchestrator_name)
         
@@ -433,7 +563,7 @@ async def process_with_agents(
             "message": response,
             "agent_name": agent_name,
             "orchestrator": orchestrator_name,
-            "suggestions": suggestions,
+            "suggestions": list(suggestions),
             "actions": []
         }
         
@@ -442,13 +572,136 @@ async def process_with_agents(
         
         # Fallback response
         return {
-            "message": f"I'm your AI financial assistant. I can help you with:\n\n💰 **Money Management** - Track spending, budgets, categorize transactions\n📈 **Investments** - Portfolio analysis, stock research (NSE/BSE), SIP recommendations\n🏦 **Financial Products** - Credit cards, loans, tax planning (India)\n\nWhat would you like to know? Please try asking a specific question.",
+            "message": _FALLBACK_MESSAGE,
             "agent_name": "finbuddy",
             "orchestrator": "orchestrator_1",
-            "suggestions": [
-                "Show my spending summary",
-                "Analyze my portfolio",
-                "Calculate my tax"
-            ],
+            "suggestions": list(_FALLBACK_SUGGESTIONS),
             "actions": []
         }
+
+
+async def stream_with_agents(
+    message: str,
+    user,
+    context: Optional[dict],
+    orchestrators: Dict[str, BaseAgent],
+    cache: CacheService
+) -> AsyncIterator[dict]:
+    """
+    Stream the agent reply to a user message.
+    
+    General questions stream LLM tokens as they are generated. Messages routed
+    to an orchestrator run its tool-using agents to completion, so their reply
+    arrives as a single response event.
+    """
+    if _route_message(message.lower()) is not None:
+        agent_response = await process_with_agents(
+            message=message,
+            user=user,
+            conversation=None,
+            context=context,
+            db=None,
+            orchestrators=orchestrators,
+            cache=cache
+        )
+        yield {
+            "event": "response",
+            "agent": agent_response["agent_name"],
+            "content": agent_response["message"]
+        }
+        return
+    
+    cache_key = _general_cache_key(message)
+    cached = await _get_cached_answer(cache, cache_key)
+    if cached:
+        yield {"event": "token", "agent": "finbuddy", "content": cached}
+        return
+    
+    try:
+        parts = []
+        async for chunk in _general_llm().astream(_general_messages(message)):
+            if chunk.content:
+                parts.append(chunk.content)
+                yield {"event": "token", "agent": "finbuddy", "content": chunk.content}
+    except Exception as e:
+        logger.error(f"Error streaming agent response: {str(e)}")
+        yield {"event": "error", "agent": "finbuddy", "content": _FALLBACK_MESSAGE}
+        return
+    
+    await _cache_answer(cache, cache_key, "".join(parts))
+
+
+def _route_message(message_lower: str) -> Optional[str]:
+    """
+    Pick the orchestrator route for a message, or None for a general query.
+    
+    Earlier routes in _ROUTE_KEYWORDS win when keywords from several match.
+    """
+    best = None
+    for match in _ROUTE_RE.finditer(message_lower):
+        route = match.lastgroup
+        if best is None or _ROUTE_PRIORITY[route] < _ROUTE_PRIORITY[best]:
+            best = route
+            if _ROUTE_PRIORITY[best] == 0:
+                break
+    return best
+
+
+@lru_cache(maxsize=1)
+def _general_llm() -> ChatOpenAI:
+    """LLM used for general (non-orchestrated) questions, shared across requests."""
+    return ChatOpenAI(
+        model=settings.OPENAI_MODEL,
+        temperature=0.7,
+        api_key=settings.OPENAI_API_KEY
+    )
+
+
+def _general_messages(message: str) -> list:
+    """Prompt for a general financial question."""
+    return [
+        SystemMessage(content=_GENERAL_SYSTEM_PROMPT),
+        HumanMessage(content=message)
+    ]
+
+
+async def _general_answer(message: str, cache: CacheService) -> str:
+    """Answer a general question, reusing a cached answer for repeated short messages."""
+    cache_key = _general_cache_key(message)
+    cached = await _get_cached_answer(cache, cache_key)
+    if cached:
+        return cached
+    
+    ai_response = await _general_llm().ainvoke(_general_messages(message))
+    await _cache_answer(cache, cache_key, ai_response.content)
+    return ai_response.content
+
+
+def _general_cache_key(message: str) -> Optional[str]:
+    """Cache key for a general message, or None if it is too long to be worth caching."""
+    normalized = " ".join(message.lower().split())
+    if not normalized or len(normalized) > GENERAL_ANSWER_CACHE_MAX_LEN:
+        return None
+    return f"chat_general:{hashlib.sha256(normalized.encode()).hexdigest()}"
+
+
+async def _get_cached_answer(cache: CacheService, cache_key: Optional[str]) -> Optional[str]:
+    """Look up a cached general answer; cache errors count as a miss."""
+    if cache_key is None:
+        return None
+    try:
+        cached = await cache.get_json(cache_key)
+    except Exception:
+        logger.warning("General answer cache unavailable", exc_info=True)
+        return None
+    return cached.get("message") if cached else None
+
+
+async def _cache_answer(cache: CacheService, cache_key: Optional[str], answer: str) -> None:
+    """Store a general answer; cache errors are logged and ignored."""
+    if cache_key is None or not answer:
+        return
+    try:
+        await cache.set_json(cache_key, {"message": answer}, ttl=GENERAL_ANSWER_CACHE_TTL)
+    except Exception:
+        logger.warning("General answer cache unavailable", exc_info=True)
@@ -8,20 +8,29 @@ from __future__ import annotations
 
 import json
 import re
-from datetime import datetime
+from datetime import datetime, timezone
 from typing import Any, Dict, List, Optional
 
+import orjson
 from fastapi import APIRouter, Depends
 from pydantic import BaseModel, Field
 
 from app.core.logging import get_logger
+from app.core.redis import CacheService, get_cache_service
 from app.dependencies import CurrentUser
+from agents.block_3.credit_card_agent import CreditCardAgent
 
 
 logger = get_logger(__name__)
 
 router = APIRouter(prefix="/credit-cards", tags=["Credit Cards"])
 
+# Recommendations only depend on the (bucketed) profile, not on the user's
+# transactions, so identical profiles share a cached agent result.
+RECOMMENDATION_CACHE_TTL = 24 * 60 * 60
+SPENDING_BUCKET = 10_000
+INCOME_BUCKET = 200_000
+
 
 class CreditCardRecommendationRequest(BaseModel):
     spending_category: str = Field(default="general")
@@ -29,6 +38,8 @@ class CreditCardRecommendationRequest(BaseModel):
     annual_income: int = Field(default=1000000, ge=0)
     country: str = Field(default="India")
     max_results: int = Field(default=8, ge=1, le=12)
+    # Include the agent's raw text in the response (skips the cache)
+    debug: bool = Field(default=False)
 
 
 class CreditCardRecommendation(BaseModel):
@@ -51,74 +62,118 @@ class CreditCardRecommendationResponse(BaseModel):
     raw_output: Optional[str] = None
 
 
+# Upper bound on how much agent output is scanned for JSON; a real card
+# list is a few KB, so anything past this is runaway output.
+MAX_PARSE_CHARS = 256_000
+
+_JSON_DECODER = json.JSONDecoder()
+_SLUG_RE = re.compile(r"[^a-z0-9]+")
+# Common wrappers: {"cards": [...]}, {"recommendations": [...]}, ...
+_CARD_LIST_KEYS = ("cards", "recommendations", "results", "data")
+
+
+def _find_json_start(text: str, pos: int) -> int:
+    """Index of the next '{' or '[' at or after ``pos``, or -1."""
+
+    obj = text.find("{", pos)
+    arr = text.find("[", pos)
+    if obj == -1:
+        return arr
+    if arr == -1:
+        return obj
+    return min(obj, arr)
+
+
+def _is_card_payload(value: Any) -> bool:
+    """Whether a decoded value can hold cards: a dict, or a list containing dicts."""
+
+    if type(value) is dict:
+        return True
+    return type(value) is list and any(type(x) is dict for x in value)
+
+
+def _scan_json(text: str, start: int, end: int) -> Optional[Any]:
+    """First card-shaped JSON value starting in ``text[start:end]``.
+
+    Values that decode but can't hold cards (e.g. a "[1]" citation in the
+    prose) are skipped over as a whole.
+    """
+
+    start = _find_json_start(text, start)
+    while start != -1 and start < end:
+        try:
+            value, value_end = _JSON_DECODER.raw_decode(text, start)
+        except ValueError:
+            start = _find_json_start(text, start + 1)
+            continue
+        if _is_card_payload(value):
+            return value
+        start = _find_json_start(text, value_end)
+
+    return None
+
+
 def _try_parse_json_blob(text: str) -> Optional[Any]:
-    """Best-effort extraction of a JSON object/array from free-form LLM output."""
+    """Best-effort extraction of a JSON object/array from free-form LLM output.
+
+    Tries the whole string first, then the fenced block if there is one, then
+    scans the rest for the first value that can hold cards.
+    """
 
     if not text:
         return None
 
-    # Fast path: whole string is JSON.
-    try:
-        return json.loads(text)
-    except Exception:
-        pass
+    if len(text) > MAX_PARSE_CHARS:
+        text = text[:MAX_PARSE_CHARS]
 
-    # Try fenced code block first.
-    m = re.search(r"```(?:json)?\s*(\{.*?\}|\[.*?\])\s*```", text, flags=re.DOTALL | re.IGNORECASE)
-    if m:
+    # Fast path: the prompt asks for bare JSON, which orjson parses whole.
+    stripped = text.strip()
+    if stripped[:1] in ("{", "[") and stripped[-1:] in ("}", "]"):
         try:
-            return json.loads(m.group(1))
-        except Exception:
+            return orjson.loads(stripped)
+        except orjson.JSONDecodeError:
             pass
 
-    # Try to extract the largest object or array-like span.
-    obj_start = text.find("{")
-    obj_end = text.rfind("}")
-    if 0 <= obj_start < obj_end:
-        candidate = text[obj_start : obj_end + 1]
-        try:
-            return json.loads(candidate)
-        except Exception:
-            pass
+    # No complete object/array can start after the last closing bracket;
+    # this stops truncated output from being re-decoded at every brace.
+    last_close = max(text.rfind("}"), text.rfind("]"))
 
-    arr_start = text.find("[")
-    arr_end = text.rfind("]")
-    if 0 <= arr_start < arr_end:
-        candidate = text[arr_start : arr_end + 1]
-        try:
-            return json.loads(candidate)
-        except Exception:
-            pass
+    # A fenced block is where the model put its answer; prefer it over any
+    # brackets in the surrounding prose.
+    fence = text.find("```")
+    if fence != -1:
+        value = _scan_json(text, fence + 3, last_close)
+        if value is not None:
+            return value
+        return _scan_json(text, 0, fence)
 
-    return None
+    return _scan_json(text, 0, last_close)
 
 
 def _normalize_cards(payload: Any) -> List[Dict[str, Any]]:
     """Convert various plausible JSON shapes into a list of card dicts."""
 
-    if payload is None:
-        return []
-
-    if isinstance(payload, dict):
-        # Common shapes: {"cards": [...]}, {"recommendations": [...]}, {"results": [...]}
-        for key in ("cards", "recommendations", "results", "data"):
+    # Payloads come straight from the JSON parser, so exact type checks suffice.
+    payload_type = type(payload)
+    if payload_type is dict:
+        for key in _CARD_LIST_KEYS:
             val = payload.get(key)
-            if isinstance(val, list):
-                return [x for x in val if isinstance(x, dict)]
+            if type(val) is list:
+                return [x for x in val if type(x) is dict]
         # Or a single card dict
         if "name" in payload:
             return [payload]
-
-    if isinstance(payload, list):
-        return [x for x in payload if isinstance(x, dict)]
+    elif payload_type is list:
+        return [x for x in payload if type(x) is dict]
 
     return []
 
 
-def _fallback_cards(spending_category: str) -> List[CreditCardRecommendation]:
-    # Conservative fallback (keeps UX working even if agent/web search fails).
-    # Note: values are illustrative; live accuracy depends on web sources.
-    base = [
+# Conservative fallback (keeps UX working even if agent/web search fails).
+# Note: values are illustrative; live accuracy depends on web sources.
+_FALLBACK_CARDS = tuple(
+    CreditCardRecommendation(**c)
+    for c in [
         {
             "id": "hdfc-millennia",
             "name": "HDFC Millennia",
@@ -165,24 +220,55 @@ def _fallback_cards(spending_category: str) -> List[CreditCardRecommendation]:
             ],
         },
     ]
+)
 
+# Category -> fallback cards with that category's cards first.
+_FALLBACK_BY_CATEGORY: Dict[str, List[CreditCardRecommendation]] = {
+    category: [c for c in _FALLBACK_CARDS if category in c.best_for]
+    + [c for c in _FALLBACK_CARDS if category not in c.best_for]
+    for category in {cat for card in _FALLBACK_CARDS for cat in card.best_for}
+}
+
+
+def _fallback_cards(spending_category: str) -> List[CreditCardRecommendation]:
     if spending_category and spending_category != "general":
-        preferred = [c for c in base if spending_category in c.get("best_for", [])]
+        preferred = _FALLBACK_BY_CATEGORY.get(spending_category)
         if preferred:
-            base = preferred + [c for c in base if c not in preferred]
+            return list(preferred)
+
+    return list(_FALLBACK_CARDS)
+
 
-    return [CreditCardRecommendation(**c) for c in base]
+def _recommendation_cache_key(request: CreditCardRecommendationRequest, spending_category: str) -> str:
+    return ":".join((
+        "credit_cards",
+        request.country.strip().lower(),
+        spending_category.lower(),
+        str(request.monthly_spending // SPENDING_BUCKET),
+        str(request.annual_income // INCOME_BUCKET),
+        str(request.max_results),
+    ))
 
 
 @router.post("/recommendations", response_model=CreditCardRecommendationResponse)
 async def get_credit_card_recommendations(
     request: CreditCardRecommendationRequest,
     current_user: CurrentUser,
+    cache: CacheService = Depends(get_cache_service),
 ):
     """Recommend credit cards using the CreditCardAgent + web-search tools."""
 
     spending_category = (request.spending_category or "general").strip()
 
+    cache_key = _recommendation_cache_key(request, spending_category)
+    if not request.debug:
+        try:
+            cached = await cache.get_json(cache_key)
+            if cached:
+                return cached
+        except Exception:
+            logger.warning("credit_card_cache_unavailable", exc_info=True)
+
     user_input = (
         "You are helping a user pick the best credit cards. "
         "Use web search tools to find recent sources and include 1-3 source URLs per card. "
@@ -214,8 +300,6 @@ async def get_credit_card_recommendations(
     )
 
     try:
-        from agents.block_3.credit_card_agent import CreditCardAgent
-
         agent = CreditCardAgent()
         result = await agent.run(user_input, context={"user_id": current_user.id})
         output_text = (result or {}).get("output", "")
@@ -229,24 +313,36 @@ async def get_credit_card_recommendations(
             card_id = card.get("id")
             if not card_id:
                 name = str(card.get("name") or f"card-{idx}")
-                card_id = re.sub(r"[^a-z0-9]+", "-", name.lower()).strip("-") or f"card-{idx}"
+                card_id = _SLUG_RE.sub("-", name.lower()).strip("-") or f"card-{idx}"
                 card["id"] = card_id
             cards.append(CreditCardRecommendation(**card))
 
+        # Only agent results are cached; the fallback is retried next time
+        cacheable = bool(cards)
         if not cards:
             cards = _fallback_cards(spending_category)
 
-        return CreditCardRecommendationResponse(
+        response = CreditCardRecommendationResponse(
             cards=cards[: request.max_results],
-            generated_at=datetime.utcnow().isoformat(),
-            raw_output=output_text,
+            generated_at=datetime.now(timezone.utc).isoformat(),
+            raw_output=output_text if request.debug else None,
         )
+        if cacheable:
+            try:
+                await cache.set_json(
+                    cache_key,
+                    response.model_dump(exclude={"raw_output"}),
+                    ttl=RECOMMENDATION_CACHE_TTL,
+                )
+            except Exception:
+                logger.warning("credit_card_cache_unavailable", exc_info=True)
+        return response
 
     except Exception as e:
         logger.error("credit_card_recommendations_failed", error=str(e))
         cards = _fallback_cards(spending_category)
         return CreditCardRecommendationResponse(
             cards=cards[: request.max_results],
-            generated_at=datetime.utcnow().isoformat(),
+            generated_at=datetime.now(timezone.utc).isoformat(),
             raw_output=None,
         )
@@ -2,79 +2,139 @@
 Dashboard API endpoints
 """
 
+import asyncio
 from datetime import datetime, timedelta
 from typing import Optional
 from fastapi import APIRouter, Depends
-from sqlalchemy import select, func
+from sqlalchemy import select, func, case, and_, extract, literal, literal_column, union_all, DateTime, Interval
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.database import async_session_maker
+from app.core.logging import get_logger
+from app.core.redis import CacheService, get_cache_service
 from app.dependencies import get_db, CurrentUser
-from app.models.transaction import Transaction, TransactionType, TransactionCategory
+from app.models.transaction import Transaction, TransactionType, TransactionCategory, RecurringTransaction
 from app.models.investment import Investment, InvestmentStatus
 
 
+logger = get_logger(__name__)
+
 router = APIRouter(prefix="/dashboard", tags=["Dashboard"])
 
+# The dashboard fetches /summary and /alerts together; both read the month
+# totals, so they're cached briefly and shared.
+MONTH_TOTALS_CACHE_TTL = 30
+
+_ONE_DAY = literal_column("interval '1 day'", Interval)
+_ONE_MONTH = literal_column("interval '1 month'", Interval)
+
+
+def _months_before(first_of_month: datetime, months: int) -> datetime:
+    """The first of the month ``months`` calendar months before ``first_of_month``."""
+    index = first_of_month.year * 12 + first_of_month.month - 1 - months
+    return first_of_month.replace(year=index // 12, month=index % 12 + 1)
+
+
+def _month_starts(now: datetime) -> tuple[datetime, datetime]:
+    """Start of the current and the previous month for ``now``."""
+    first_of_month = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    return first_of_month, _months_before(first_of_month, 1)
+
+
+async def _month_totals(
+    db: AsyncSession,
+    cache: CacheService,
+    user_id: str,
+    now: datetime,
+) -> dict:
+    """Income and expenses for the current and previous month."""
+    first_of_month, first_of_prev_month = _month_starts(now)
+    cache_key = f"dashboard:month_totals:{user_id}:{first_of_month:%Y-%m}"
+    try:
+        cached = await cache.get_json(cache_key)
+        if cached:
+            return cached
+    except Exception:
+        logger.warning("Month totals cache unavailable", exc_info=True)
+    
+    # Both months in one pass
+    is_current = Transaction.transaction_date >= first_of_month
+    is_credit = Transaction.transaction_type == TransactionType.CREDIT
+    is_debit = Transaction.transaction_type == TransactionType.DEBIT
+    
+    def _total(*conditions):
+        return func.coalesce(func.sum(case((and_(*conditions), Transaction.amount), else_=0)), 0)
+    
+    result = await db.execute(
+        select(
+            _total(is_current, is_credit),
+            _total(is_current, is_debit),
+            _total(~is_current, is_credit),
+            _total(~is_current, is_debit),
+        )
+        .where(Transaction.user_id == user_id)
+        .where(Transaction.transaction_date >= first_of_prev_month)
+    )
+    income, expenses, prev_income, prev_expenses = result.one()
+    totals = {
+        "income": float(income),
+        "expenses": float(expenses),
+        "prev_income": float(prev_income),
+        "prev_expenses": float(prev_expenses),
+    }
+    
+    try:
+        await cache.set_json(cache_key, totals, ttl=MONTH_TOTALS_CACHE_TTL)
+    except Exception:
+        logger.warning("Month totals cache unavailable", exc_info=True)
+    return totals
+
 
 @router.get("/summary")
 async def get_dashboard_summary(
     current_user: CurrentUser,
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_db),
+    cache: CacheService = Depends(get_cache_service),
 ):
     """Get dashboard summary with key financial metrics."""
-    # Get current month date range
     today = datetime.utcnow()
-    first_of_month = today.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-    
-    # Previous month
-    if today.month == 1:
-        first_of_prev_month = today.replace(year=today.year - 1, month=12, day=1)
-    else:
-        first_of_prev_month = today.replace(month=today.month - 1, day=1)
+    first_of_month, _ = _month_starts(today)
     
-    # Get transactions for current month
-    result = await db.execute(
-        select(Transaction)
+    investments_stmt = (
+        select(
+            func.coalesce(func.sum(Investment.invested_amount), 0),
+            func.coalesce(func.sum(func.coalesce(func.nullif(Investment.current_value, 0), Investment.invested_amount)), 0),
+        )
+        .where(Investment.user_id == current_user.id)
+        .where(Investment.status == InvestmentStatus.ACTIVE)
+    )
+    categories_stmt = (
+        select(Transaction.category, func.sum(Transaction.amount))
         .where(Transaction.user_id == current_user.id)
         .where(Transaction.transaction_date >= first_of_month)
+        .where(Transaction.transaction_type == TransactionType.DEBIT)
+        .group_by(Transaction.category)
     )
-    current_month_txns = result.scalars().all()
     
-    # Get transactions for previous month
-    result = await db.execute(
-        select(Transaction)
-        .where(Transaction.user_id == current_user.id)
-        .where(Transaction.transaction_date >= first_of_prev_month)
-        .where(Transaction.transaction_date < first_of_month)
-    )
-    prev_month_txns = result.scalars().all()
+    # The three queries are independent; an AsyncSession can't run two at
+    # once, so the extra ones get their own sessions.
+    async with async_session_maker() as inv_db, async_session_maker() as cat_db:
+        totals, inv_result, cat_result = await asyncio.gather(
+            _month_totals(db, cache, current_user.id, today),
+            inv_db.execute(investments_stmt),
+            cat_db.execute(categories_stmt),
+        )
+        total_invested, current_value = inv_result.one()
+        category_rows = cat_result.all()
     
-    # Calculate current month metrics
-    current_income = sum(t.amount for t in current_month_txns if t.transaction_type == TransactionType.CREDIT)
-    current_expenses = sum(t.amount for t in current_month_txns if t.transaction_type == TransactionType.DEBIT)
+    current_income, current_expenses = totals["income"], totals["expenses"]
+    prev_income, prev_expenses = totals["prev_income"], totals["prev_expenses"]
     current_savings = current_income - current_expenses
     
-    # Calculate previous month metrics
-    prev_income = sum(t.amount for t in prev_month_txns if t.transaction_type == TransactionType.CREDIT)
-    prev_expenses = sum(t.amount for t in prev_month_txns if t.transaction_type == TransactionType.DEBIT)
-    
-    # Get investments
-    result = await db.execute(
-        select(Investment)
-        .where(Investment.user_id == current_user.id)
-        .where(Investment.status == InvestmentStatus.ACTIVE)
-    )
-    investments = result.scalars().all()
-    
-    total_invested = sum(i.invested_amount for i in investments)
-    current_value = sum(i.current_value or i.invested_amount for i in investments)
-    
-    # Calculate spending by category
-    spending_by_category = {}
-    for t in current_month_txns:
-        if t.transaction_type == TransactionType.DEBIT:
-            cat = t.category.value
-            spending_by_category[cat] = spending_by_category.get(cat, 0) + t.amount
+    spending_by_category = {
+        (cat.value if cat else "other"): amount
+        for cat, amount in category_rows
+    }
     
     return {
         "total_balance": current_savings + current_value,
@@ -116,37 +176,38 @@ async def get_spending_trends(
     period: str = "month"
 ):
     """Get spending trends over the past months."""
-    today = datetime.utcnow()
-    start_date = today - timedelta(days=months * 30)
+    # Whole calendar months: this one plus the previous ``months - 1``
+    first_of_month, _ = _month_starts(datetime.utcnow())
+    start_date = _months_before(first_of_month, max(months - 1, 0))
     
+    month = func.date_trunc("month", Transaction.transaction_date, type_=DateTime).label("month")
     result = await db.execute(
-        select(Transaction)
+        select(month, Transaction.transaction_type, Transaction.category, func.sum(Transaction.amount))
         .where(Transaction.user_id == current_user.id)
         .where(Transaction.transaction_date >= start_date)
-        .order_by(Transaction.transaction_date)
+        .group_by(month, Transaction.transaction_type, Transaction.category)
+        .order_by(month)
     )
-    transactions = result.scalars().all()
     
-    # Group by month
+    # Group by month; one row per (month, type, category)
     monthly_data = {}
-    for t in transactions:
-        month_key = t.transaction_date.strftime("%Y-%m")
-        month_label = t.transaction_date.strftime("%b %Y")
+    for month_start, txn_type, category, amount in result.all():
+        month_key = month_start.strftime("%Y-%m")
         if month_key not in monthly_data:
             monthly_data[month_key] = {
-                "month": month_label,
+                "month": month_start.strftime("%b %Y"),
                 "income": 0, 
                 "expenses": 0, 
                 "by_category": {}
             }
         
-        if t.transaction_type == TransactionType.CREDIT:
-            monthly_data[month_key]["income"] += float(t.amount)
+        if txn_type == TransactionType.CREDIT:
+            monthly_data[month_key]["income"] += float(amount)
         else:
-            monthly_data[month_key]["expenses"] += float(t.amount)
-            cat = t.category.value if t.category else "other"
+            monthly_data[month_key]["expenses"] += float(amount)
+            cat = category.value if category else "other"
             monthly_data[month_key]["by_category"][cat] = \
-                monthly_data[month_key]["by_category"].get(cat, 0) + float(t.amount)
+                monthly_data[month_key]["by_category"].get(cat, 0) + float(amount)
     
     # Convert to array format for frontend
     trends_array = []
@@ -162,61 +223,58 @@ async def get_upcoming_payments(
     db: AsyncSession = Depends(get_db)
 ):
     """Get upcoming recurring payments and SIPs."""
-    # Get recurring transactions
-    from app.models.transaction import RecurringTransaction
+    # Next SIP date: this month's sip_date, or next month's if it has passed.
+    # Built from the month start so short months roll over instead of failing.
+    now = func.timezone("utc", func.now())
+    sip_month = case(
+        (Investment.sip_date < extract("day", now), func.date_trunc("month", now + _ONE_MONTH, type_=DateTime)),
+        else_=func.date_trunc("month", now, type_=DateTime),
+    )
+    sip_next_date = sip_month + (Investment.sip_date - 1) * _ONE_DAY
     
-    result = await db.execute(
-        select(RecurringTransaction)
+    recurring = (
+        select(
+            RecurringTransaction.name.label("name"),
+            RecurringTransaction.amount.label("amount"),
+            RecurringTransaction.next_expected_date.label("due_date"),
+            literal("recurring").label("kind"),
+            RecurringTransaction.category.label("category"),
+        )
         .where(RecurringTransaction.user_id == current_user.id)
         .where(RecurringTransaction.is_active == True)
-        .order_by(RecurringTransaction.next_expected_date)
+        .where(RecurringTransaction.next_expected_date.is_not(None))
     )
-    recurring = result.scalars().all()
-    
-    # Get SIP investments
-    result = await db.execute(
-        select(Investment)
+    sips = (
+        select(
+            (literal("SIP - ") + Investment.name).label("name"),
+            Investment.sip_amount.label("amount"),
+            sip_next_date.label("due_date"),
+            literal("sip").label("kind"),
+            literal(TransactionCategory.INVESTMENTS, RecurringTransaction.category.type).label("category"),
+        )
         .where(Investment.user_id == current_user.id)
         .where(Investment.is_sip == True)
         .where(Investment.status == InvestmentStatus.ACTIVE)
+        .where(Investment.sip_date > 0)
     )
-    sips = result.scalars().all()
-    
-    upcoming = []
-    
-    for r in recurring:
-        if r.next_expected_date:
-            upcoming.append({
-                "name": r.name,
-                "amount": r.amount,
-                "date": r.next_expected_date,
-                "type": "recurring",
-                "category": r.category.value
-            })
-    
-    for s in sips:
-        if s.sip_date:
-            # Calculate next SIP date
-            today = datetime.utcnow()
-            next_date = today.replace(day=s.sip_date)
-            if next_date < today:
-                if today.month == 12:
-                    next_date = next_date.replace(year=today.year + 1, month=1)
-                else:
-                    next_date = next_date.replace(month=today.month + 1)
-            
-            upcoming.append({
-                "name": f"SIP - {s.name}",
-                "amount": s.sip_amount,
-                "date": next_date,
-                "type": "sip",
-                "category": "investments"
-            })
+    upcoming = union_all(recurring, sips).subquery()
     
-    # Sort by date
-    upcoming.sort(key=lambda x: x["date"])
+    result = await db.execute(
+        select(upcoming).order_by(upcoming.c.due_date).limit(10)
+    )
     
-    return {"upcoming_payments": upcoming[:10]}
+    return {
+        "upcoming_payments": [
+            {
+                "name": row.name,
+                "amount": row.amount,
+                "date": row.due_date,
+                "type": row.kind,
+                "category": row.category.value,
+            }
+            for row in result.all()
+        ]
+    }
 
 
 @router.get("/goals-progress")
@@ -262,23 +320,30 @@ async def get_goals_progress(
 @router.get("/alerts")
 async def get_financial_alerts(
     current_user: CurrentUser,
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_db),
+    cache: CacheService = Depends(get_cache_service),
 ):
     """Get financial alerts and notifications."""
     alerts = []
     
     # Check spending vs previous month
     today = datetime.utcnow()
-    first_of_month = today.replace(day=1)
     
-    # Get this month's spending
-    result = await db.execute(
-        select(func.sum(Transaction.amount))
-        .where(Transaction.user_id == current_user.id)
-        .where(Transaction.transaction_date >= first_of_month)
-        .where(Transaction.transaction_type == TransactionType.DEBIT)
+    # This month's spending and the bills due within a week are independent;
+    # the bills query gets its own session so both run at once.
+    bills_stmt = (
+        select(RecurringTransaction)
+        .where(RecurringTransaction.user_id == current_user.id)
+        .where(RecurringTransaction.is_active == True)
+        .where(RecurringTransaction.next_expected_date <= today + timedelta(days=7))
     )
-    current_spending = result.scalar() or 0
+    async with async_session_maker() as bills_db:
+        totals, bills_result = await asyncio.gather(
+            _month_totals(db, cache, current_user.id, today),
+            bills_db.execute(bills_stmt),
+        )
+        upcoming_bills = bills_result.scalars().all()
+    current_spending = totals["expenses"]
     
     # Check if overspending
     monthly_income = current_user.monthly_income or 0
@@ -295,17 +360,7 @@ async def get_financial_alerts(
                 "action": "Review your recent transactions"
             })
     
-    # Check for upcoming bills
-    from app.models.transaction import RecurringTransaction
-    
-    result = await db.execute(
-        select(RecurringTransaction)
-        .where(RecurringTransaction.user_id == current_user.id)
-        .where(RecurringTransaction.is_active == True)
-        .where(RecurringTransaction.next_expected_date <= today + timedelta(days=7))
-    )
-    upcoming_bills = result.scalars().all()
-    
+    # Upcoming bills
     for bill in upcoming_bills:
         alerts.append({
             "type": "info",
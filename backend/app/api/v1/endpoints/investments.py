@@ -2,12 +2,17 @@
 Investment API endpoints
 """
 
+import asyncio
 from datetime import datetime
 from typing import Optional, List
 from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy import select, func
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import raiseload
 
+from app.core.database import async_session_maker
+from app.core.logging import get_logger
+from app.core.redis import CacheService, get_cache_service
 from app.dependencies import get_db, CurrentUser
 from app.models.investment import Investment, InvestmentHolding, Watchlist, InvestmentType, InvestmentStatus
 from app.schemas.investment import (
@@ -23,8 +28,58 @@ from app.schemas.investment import (
 )
 
 
+logger = get_logger(__name__)
+
 router = APIRouter(prefix="/investments", tags=["Investments"])
 
+# Per-type portfolio totals are invalidated by the write endpoints below; the
+# TTL only bounds staleness from writes made outside this API.
+PORTFOLIO_TOTALS_CACHE_TTL = 10 * 60
+
+
+def _portfolio_totals_key(user_id: str) -> str:
+    return f"investments:portfolio_totals:{user_id}"
+
+
+async def _portfolio_totals(db: AsyncSession, cache: CacheService, user_id: str) -> list:
+    """[investment_type, count, invested, current] for each type of active investment."""
+    cache_key = _portfolio_totals_key(user_id)
+    try:
+        cached = await cache.get_json(cache_key)
+        if cached is not None:
+            return cached
+    except Exception:
+        logger.warning("Portfolio totals cache unavailable", exc_info=True)
+    
+    result = await db.execute(
+        select(
+            Investment.investment_type,
+            func.count(),
+            func.sum(Investment.invested_amount),
+            func.sum(func.coalesce(func.nullif(Investment.current_value, 0), Investment.invested_amount)),
+        )
+        .where(Investment.user_id == user_id)
+        .where(Investment.status == InvestmentStatus.ACTIVE)
+        .group_by(Investment.investment_type)
+    )
+    totals = [
+        [inv_type.value, count, invested, current]
+        for inv_type, count, invested, current in result.all()
+    ]
+    
+    try:
+        await cache.set_json(cache_key, totals, ttl=PORTFOLIO_TOTALS_CACHE_TTL)
+    except Exception:
+        logger.warning("Portfolio totals cache unavailable", exc_info=True)
+    return totals
+
+
+async def _invalidate_portfolio_totals(cache: CacheService, user_id: str) -> None:
+    try:
+        await cache.delete(_portfolio_totals_key(user_id))
+    except Exception:
+        logger.warning("Portfolio totals cache unavailable", exc_info=True)
+
 
 @router.get("", response_model=InvestmentList)
 async def get_investments(
@@ -34,7 +89,12 @@ async def get_investments(
     status: Optional[InvestmentStatus] = None
 ):
     """Get all investments for the current user."""
-    query = select(Investment).where(Investment.user_id == current_user.id)
+    # InvestmentResponse has no holdings; fail loudly rather than lazy-load per row
+    query = (
+        select(Investment)
+        .options(raiseload("*"))
+        .where(Investment.user_id == current_user.id)
+    )
     
     if investment_type:
         query = query.where(Investment.investment_type == investment_type)
@@ -64,7 +124,8 @@ async def get_investments(
 async def create_investment(
     investment_data: InvestmentCreate,
     current_user: CurrentUser,
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_db),
+    cache: CacheService = Depends(get_cache_service)
 ):
     """Create a new investment."""
     # Calculate purchase price if not provided
@@ -83,6 +144,7 @@ async def create_investment(
     
     db.add(investment)
     await db.commit()
+    await _invalidate_portfolio_totals(cache, current_user.id)
     await db.refresh(investment)
     
     return investment
@@ -91,47 +153,59 @@ async def create_investment(
 @router.get("/portfolio", response_model=PortfolioSummary)
 async def get_portfolio_summary(
     current_user: CurrentUser,
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_db),
+    cache: CacheService = Depends(get_cache_service)
 ):
     """Get portfolio summary and analysis."""
-    result = await db.execute(
-        select(Investment)
-        .where(Investment.user_id == current_user.id)
-        .where(Investment.status == InvestmentStatus.ACTIVE)
+    active = (
+        (Investment.user_id == current_user.id)
+        & (Investment.status == InvestmentStatus.ACTIVE)
     )
-    investments = result.scalars().all()
     
-    total_invested = sum(i.invested_amount for i in investments)
-    current_value = sum(i.current_value or i.invested_amount for i in investments)
+    # Top and worst performers come straight off the index; name and return
+    # are all the lists need
+    performers = select(Investment.name, Investment.percentage_return).where(active)
+    top_stmt = (
+        performers
+        .where(Investment.percentage_return > 0)
+        .order_by(Investment.percentage_return.desc())
+        .limit(5)
+    )
+    worst_stmt = (
+        performers
+        .where(Investment.percentage_return < 0)
+        .order_by(Investment.percentage_return.asc())
+        .limit(5)
+    )
+    
+    # Independent queries; an AsyncSession can't run two at once, so the
+    # performer queries get their own sessions.
+    async with async_session_maker() as top_db, async_session_maker() as worst_db:
+        totals_rows, top_result, worst_result = await asyncio.gather(
+            _portfolio_totals(db, cache, current_user.id),
+            top_db.execute(top_stmt),
+            worst_db.execute(worst_stmt),
+        )
+        top_rows = top_result.all()
+        worst_rows = worst_result.all()
+    
+    by_type = {}
+    active_count = 0
+    for inv_type, count, invested, current in totals_rows:
+        by_type[inv_type] = {"invested": invested, "current": current, "returns": current - invested}
+        active_count += count
+    
+    total_invested = sum(t["invested"] for t in by_type.values())
+    current_value = sum(t["current"] for t in by_type.values())
     total_returns = current_value - total_invested
     percentage_returns = (total_returns / total_invested * 100) if total_invested > 0 else 0
     
-    # Group by type
-    by_type = {}
-    for inv in investments:
-        inv_type = inv.investment_type.value
-        if inv_type not in by_type:
-            by_type[inv_type] = {"invested": 0, "current": 0, "returns": 0}
-        by_type[inv_type]["invested"] += inv.invested_amount
-        by_type[inv_type]["current"] += inv.current_value or inv.invested_amount
-        by_type[inv_type]["returns"] = by_type[inv_type]["current"] - by_type[inv_type]["invested"]
-    
-    # Group by status
-    by_status = {}
-    for inv in investments:
-        status = inv.status.value
-        by_status[status] = by_status.get(status, 0) + 1
-    
-    # Top and worst performers
-    performers = sorted(investments, key=lambda x: x.percentage_return or 0, reverse=True)
-    top_performers = [
-        {"name": p.name, "returns": p.percentage_return or 0}
-        for p in performers[:5] if p.percentage_return and p.percentage_return > 0
-    ]
-    worst_performers = [
-        {"name": p.name, "returns": p.percentage_return or 0}
-        for p in performers[-5:] if p.percentage_return and p.percentage_return < 0
-    ]
+    # Only active investments are summarised
+    by_status = {InvestmentStatus.ACTIVE.value: active_count} if active_count else {}
+    
+    top_performers = [{"name": name, "returns": returns} for name, returns in top_rows]
+    # Worst list is shown best-first, as the tail of the descending order
+    worst_performers = [{"name": name, "returns": returns} for name, returns in reversed(worst_rows)]
     
     return PortfolioSummary(
         total_invested=total_invested,
@@ -229,7 +303,8 @@ async def update_investment(
     investment_id: str,
     investment_update: InvestmentUpdate,
     current_user: CurrentUser,
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_db),
+    cache: CacheService = Depends(get_cache_service)
 ):
     """Update an investment."""
     result = await db.execute(
@@ -248,12 +323,10 @@ async def update_investment(
     for field, value in investment_update.model_dump(exclude_unset=True).items():
         setattr(investment, field, value)
     
-    # Recalculate returns
-    if investment.current_value and investment.invested_amount:
-        investment.absolute_return = investment.current_value - investment.invested_amount
-        investment.percentage_return = (investment.absolute_return / investment.invested_amount) * 100
-    
+    # absolute_return / percentage_return are generated columns; refresh
+    # picks up the values PostgreSQL derived from the update
     await db.commit()
+    await _invalidate_portfolio_totals(cache, current_user.id)
     await db.refresh(investment)
     
     return investment
@@ -263,7 +336,8 @@ async def update_investment(
 async def delete_investment(
     investment_id: str,
     current_user: CurrentUser,
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_db),
+    cache: CacheService = Depends(get_cache_service)
 ):
     """Delete an investment."""
     result = await db.execute(
@@ -281,6 +355,7 @@ async def delete_investment(
     
     await db.delete(investment)
     await db.commit()
+    await _invalidate_portfolio_totals(cache, current_user.id)
 
 
 @router.post("/{investment_id}/holdings", response_model=InvestmentHoldingResponse)
@@ -288,7 +363,8 @@ async def add_holding(
     investment_id: str,
     holding_data: InvestmentHoldingCreate,
     current_user: CurrentUser,
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_db),
+    cache: CacheService = Depends(get_cache_service)
 ):
     """Add a holding to an investment."""
     result = await db.execute(
@@ -320,6 +396,7 @@ async def add_holding(
         investment.quantity = (investment.quantity or 0) - holding_data.quantity
     
     await db.commit()
+    await _invalidate_portfolio_totals(cache, current_user.id)
     await db.refresh(holding)
     
     return holding
@@ -3,20 +3,37 @@ SMS Transaction API endpoints for Android Connector
 """
 
 from datetime import datetime
-from typing import Optional, List
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy import select, func, and_
+from typing import Optional, List, Tuple
+from fastapi import APIRouter, Depends, HTTPException, Response, status
+from sqlalchemy import select, func, and_, tuple_, text, table, column, JSON
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncSession
 from pydantic import BaseModel, Field
+import base64
 import uuid
 import hashlib
+import re
+from enum import Enum
+
+import orjson
 
 from app.dependencies import get_db, CurrentUser
-from app.models.transaction import Transaction, TransactionType, TransactionCategory, TransactionSource
+from app.models.transaction import (
+    SMS_REFERENCE_PREDICATE,
+    Transaction,
+    TransactionType,
+    TransactionCategory,
+    TransactionSource,
+)
 
 
 router = APIRouter(prefix="/sms", tags=["SMS Transactions"])
 
+# Batches larger than this are written with COPY instead of INSERT
+COPY_THRESHOLD = 100
+# Temp table COPY writes into before rows are moved to transactions
+COPY_STAGING_TABLE = "sms_transactions_staging"
+
 
 # Request/Response Models
 class ParsedTransactionData(BaseModel):
@@ -74,21 +91,78 @@ class SyncCompleteRequest(BaseModel):
     transactions_count: int
 
 
+# Merchant keywords per category; earlier categories win when several match.
+_MERCHANT_KEYWORDS = (
+    (TransactionCategory.BILLS, ("electricity", "water", "gas", "broadband", "internet", "mobile", "phone", "recharge")),
+    (TransactionCategory.ESSENTIALS, ("grocery", "groceries", "supermarket", "vegetables", "milk", "provisions")),
+    (TransactionCategory.SPENDS, ("restaurant", "cafe", "coffee", "movie", "entertainment", "shopping", "mall")),
+    (TransactionCategory.INVESTMENTS, ("mutual", "fund", "stock", "share", "sip", "investment", "trading")),
+    (TransactionCategory.INCOME, ("salary", "credit", "refund", "cashback")),
+    (TransactionCategory.TRANSFER, ("transfer", "neft", "imps", "rtgs", "upi")),
+    (TransactionCategory.SAVINGS, ("fd", "fixed deposit", "rd", "recurring")),
+)
+_MERCHANT_PRIORITY = {category: i for i, (category, _) in enumerate(_MERCHANT_KEYWORDS)}
+_MERCHANT_CATEGORIES = {category.name: category for category, _ in _MERCHANT_KEYWORDS}
+
+# One pass over the merchant finds every keyword occurrence; the empty
+# lookahead lets matches overlap so no keyword hides another.
+_MERCHANT_RE = re.compile(
+    "(?=(?:"
+    + "|".join(
+        f"(?P<{category.name}>{'|'.join(map(re.escape, words))})"
+        for category, words in _MERCHANT_KEYWORDS
+    )
+    + "))"
+)
+
+# Common merchants whose names contain none of the keywords above, matched
+# on the whole (lowercased) merchant name before the keyword scan.
+_MERCHANT_EXACT = {
+    **dict.fromkeys(("amazon", "flipkart", "myntra", "swiggy", "zomato", "uber", "ola", "irctc"), TransactionCategory.SPENDS),
+    **dict.fromkeys(("bigbasket", "blinkit", "zepto", "dmart"), TransactionCategory.ESSENTIALS),
+    **dict.fromkeys(("netflix", "spotify", "hotstar", "jio", "airtel"), TransactionCategory.BILLS),
+    **dict.fromkeys(("zerodha", "groww"), TransactionCategory.INVESTMENTS),
+}
+
+
 def generate_sms_hash(sms_body: str, sender: str, timestamp: int) -> str:
     """Generate unique hash for SMS to detect duplicates"""
-    content = f"{sms_body}:{sender}:{timestamp}"
-    return hashlib.sha256(content.encode()).hexdigest()[:32]
+    # Same digest as hashing f"{sms_body}:{sender}:{timestamp}", without
+    # building the joined string first
+    h = hashlib.sha256(sms_body.encode())
+    h.update(b":")
+    h.update(sender.encode())
+    h.update(b":%d" % timestamp)
+    return h.digest()[:16].hex()
+
+
+_TXN_TYPE_MAP = {
+    "credit": TransactionType.CREDIT,
+    "debit": TransactionType.DEBIT,
+}
+
+_CATEGORY_MAP = {
+    "needs": TransactionCategory.NEEDS,
+    "essentials": TransactionCategory.ESSENTIALS,
+    "spends": TransactionCategory.SPENDS,
+    "bills": TransactionCategory.BILLS,
+    "savings": TransactionCategory.SAVINGS,
+    "investments": TransactionCategory.INVESTMENTS,
+    "income": TransactionCategory.INCOME,
+    "transfer": TransactionCategory.TRANSFER,
+    "other": TransactionCategory.OTHER,
+}
 
 
 def parse_transaction_type(type_str: Optional[str]) -> TransactionType:
     """Convert string to TransactionType enum"""
-    if type_str:
-        type_lower = type_str.lower()
-        if type_lower == "credit":
-            return TransactionType.CREDIT
-        elif type_lower == "debit":
-            return TransactionType.DEBIT
-    return TransactionType.DEBIT  # Default to debit if unknown
+    if not type_str:
+        return TransactionType.DEBIT
+    # The app normally sends lowercase, so try the string as-is first
+    transaction_type = _TXN_TYPE_MAP.get(type_str)
+    if transaction_type is None:
+        transaction_type = _TXN_TYPE_MAP.get(type_str.lower(), TransactionType.DEBIT)  # Default to debit if unknown
+    return transaction_type
 
 
 def categorize_transaction(parsed_data: Optional[ParsedTransactionData]) -> TransactionCategory:
@@ -98,40 +172,155 @@ def categorize_transaction(parsed_data: Optional[ParsedTransactionData]) -> Tran
     
     # Use category from Android app if provided
     if parsed_data.category:
-        category_map = {
-            "needs": TransactionCategory.NEEDS,
-            "essentials": TransactionCategory.ESSENTIALS,
-            "spends": TransactionCategory.SPENDS,
-            "bills": TransactionCategory.BILLS,
-            "savings": TransactionCategory.SAVINGS,
-            "investments": TransactionCategory.INVESTMENTS,
-            "income": TransactionCategory.INCOME,
-            "transfer": TransactionCategory.TRANSFER,
-            "other": TransactionCategory.OTHER,
-        }
-        return category_map.get(parsed_data.category.lower(), TransactionCategory.OTHER)
+        category = _CATEGORY_MAP.get(parsed_data.category)
+        if category is None:
+            category = _CATEGORY_MAP.get(parsed_data.category.lower(), TransactionCategory.OTHER)
+        return category
     
     if not parsed_data.merchant:
         return TransactionCategory.OTHER
     
     merchant_lower = parsed_data.merchant.lower()
     
-    # Define category mappings
-    category_keywords = {
-        TransactionCategory.BILLS: ["electricity", "water", "gas", "broadband", "internet", "mobile", "phone", "recharge"],
-        TransactionCategory.ESSENTIALS: ["grocery", "groceries", "supermarket", "vegetables", "milk", "provisions"],
-        TransactionCategory.SPENDS: ["restaurant", "cafe", "coffee", "movie", "entertainment", "shopping", "mall"],
-        TransactionCategory.INVESTMENTS: ["mutual", "fund", "stock", "share", "sip", "investment", "trading"],
-        TransactionCategory.INCOME: ["salary", "credit", "refund", "cashback"],
-        TransactionCategory.TRANSFER: ["transfer", "neft", "imps", "rtgs", "upi"],
-        TransactionCategory.SAVINGS: ["fd", "fixed deposit", "rd", "recurring"],
+    exact = _MERCHANT_EXACT.get(merchant_lower.strip())
+    if exact:
+        return exact
+    
+    best = None
+    for match in _MERCHANT_RE.finditer(merchant_lower):
+        category = _MERCHANT_CATEGORIES[match.lastgroup]
+        if best is None or _MERCHANT_PRIORITY[category] < _MERCHANT_PRIORITY[best]:
+            best = category
+            if _MERCHANT_PRIORITY[best] == 0:
+                break
+    
+    return best or TransactionCategory.OTHER
+
+
+def sms_transaction_values(request: SmsTransactionRequest, sms_hash: str, user_id: str) -> dict:
+    """Column values for the Transaction created from an uploaded SMS"""
+    parsed = request.parsed_data
+    # Dump the parsed model once; fields are read from the dict
+    parsed_dump = parsed.model_dump() if parsed else None
+    fields = parsed_dump or {}
+    
+    return {
+        "id": str(uuid.uuid4()),
+        "user_id": user_id,
+        "amount": fields.get("amount") or 0.0,
+        "transaction_type": parse_transaction_type(fields.get("transaction_type")),
+        "category": categorize_transaction(parsed),
+        "description": request.sms_body[:500],  # Limit description length
+        "merchant_name": fields.get("merchant"),
+        "source": TransactionSource.SMS,
+        "source_reference": sms_hash,
+        "raw_data": {
+            "sms_body": request.sms_body,
+            "sender": request.sender,
+            "timestamp": request.timestamp,
+            "parsed_data": parsed_dump
+        },
+        "account_number": fields.get("account_number"),
+        "bank_name": fields.get("bank_name") if parsed else request.sender,
+        "transaction_id": fields.get("reference_number"),
+        "transaction_date": datetime.fromtimestamp(request.timestamp / 1000),
+        "is_verified": False,
     }
+
+
+def _copy_value(column, row: dict):
+    """Value for ``column`` as asyncpg's COPY encoder expects it"""
+    if column.key in row:
+        value = row[column.key]
+    elif column.default is None:
+        return None
+    elif column.default.is_callable:
+        value = column.default.arg(None)
+    else:
+        value = column.default.arg
+    
+    if isinstance(value, Enum):
+        # SQLEnum columns store the member name
+        return value.name
+    if value is not None and isinstance(column.type, JSON):
+        return orjson.dumps(value).decode()
+    return value
+
+
+async def copy_transactions(db: AsyncSession, rows: List[dict]) -> dict:
+    """
+    Bulk-write SMS transaction rows with COPY in the session's transaction.
+    
+    COPY can't skip conflicts, so rows go into a temp table first and are
+    moved across with the same ON CONFLICT as _sms_insert; an SMS uploaded
+    concurrently is skipped rather than failing the batch. Returns SMS hash ->
+    transaction id for the rows actually inserted.
+    """
+    columns = list(Transaction.__table__.columns)
+    records = [tuple(_copy_value(col, row) for col in columns) for row in rows]
     
-    for category, keywords in category_keywords.items():
-        if any(keyword in merchant_lower for keyword in keywords):
-            return category
+    await db.execute(text(
+        f"CREATE TEMP TABLE {COPY_STAGING_TABLE} "
+        f"(LIKE {Transaction.__tablename__}) ON COMMIT DROP"
+    ))
     
-    return TransactionCategory.OTHER
+    # COPY bypasses SQLAlchemy, so column defaults are filled in above
+    connection = await db.connection()
+    raw = await connection.get_raw_connection()
+    await raw.driver_connection.copy_records_to_table(
+        COPY_STAGING_TABLE,
+        records=records,
+        columns=[col.name for col in columns],
+    )
+    
+    staging = table(COPY_STAGING_TABLE, *(column(col.name) for col in columns))
+    result = await db.execute(
+        _sms_insert()
+        .from_select(columns, select(*staging.c))
+        .returning(Transaction.source_reference, Transaction.id)
+    )
+    return dict(result.all())
+
+
+def _encode_cursor(transaction) -> str:
+    """Opaque page cursor for the position just after a transaction (ORM object or row)"""
+    raw = f"{transaction.transaction_date.isoformat()}|{transaction.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def _decode_cursor(cursor: str) -> Tuple[datetime, str]:
+    """Decode a cursor from _encode_cursor into (transaction_date, id)"""
+    try:
+        transaction_date, transaction_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|", 1)
+        return datetime.fromisoformat(transaction_date), transaction_id
+    except (ValueError, UnicodeDecodeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+
+
+def _sms_insert():
+    """INSERT into transactions that skips SMS already uploaded by the user"""
+    return pg_insert(Transaction).on_conflict_do_nothing(
+        index_elements=["user_id", "source_reference"],
+        index_where=SMS_REFERENCE_PREDICATE,
+    )
+
+
+async def _existing_sms_ids(db: AsyncSession, user_id: str, hashes: List[str]) -> dict:
+    """Map of SMS hash -> transaction id for hashes the user already uploaded"""
+    result = await db.execute(
+        select(Transaction.source_reference, Transaction.id).where(
+            and_(
+                Transaction.user_id == user_id,
+                # Literal predicate so the planner can use the partial index
+                SMS_REFERENCE_PREDICATE,
+                Transaction.source_reference.in_(hashes)
+            )
+        )
+    )
+    return dict(result.all())
 
 
 @router.post("/transactions", response_model=SmsTransactionResponse, status_code=status.HTTP_201_CREATED)
@@ -145,60 +334,26 @@ async def upload_sms_transaction(
     # Generate hash to check for duplicates
     sms_hash = generate_sms_hash(request.sms_body, request.sender, request.timestamp)
     
-    # Check for duplicates
-    existing_query = select(Transaction).where(
-        and_(
-            Transaction.user_id == current_user.id,
-            Transaction.source_reference == sms_hash
-        )
+    # Insert unless this SMS was already uploaded; the unique index makes
+    # the check atomic
+    values = sms_transaction_values(request, sms_hash, current_user.id)
+    result = await db.execute(
+        _sms_insert().values(**values).returning(Transaction.id)
     )
-    existing = (await db.execute(existing_query)).scalar_one_or_none()
+    transaction_id = result.scalar_one_or_none()
     
-    if existing:
+    if transaction_id is None:
+        existing = await _existing_sms_ids(db, current_user.id, [sms_hash])
         return SmsTransactionResponse(
-            id=existing.id,
+            id=existing[sms_hash],
             status="duplicate",
             message="Transaction already exists"
         )
     
-    # Parse transaction data
-    parsed = request.parsed_data
-    transaction_type = parse_transaction_type(parsed.transaction_type if parsed else None)
-    category = categorize_transaction(parsed)
-    
-    # Convert timestamp to datetime
-    transaction_date = datetime.fromtimestamp(request.timestamp / 1000)
-    
-    # Create transaction
-    transaction = Transaction(
-        id=str(uuid.uuid4()),
-        user_id=current_user.id,
-        amount=parsed.amount if parsed and parsed.amount else 0.0,
-        transaction_type=transaction_type,
-        category=category,
-        description=request.sms_body[:500],  # Limit description length
-        merchant_name=parsed.merchant if parsed else None,
-        source=TransactionSource.SMS,
-        source_reference=sms_hash,
-        raw_data={
-            "sms_body": request.sms_body,
-            "sender": request.sender,
-            "timestamp": request.timestamp,
-            "parsed_data": parsed.dict() if parsed else None
-        },
-        account_number=parsed.account_number if parsed else None,
-        bank_name=parsed.bank_name if parsed else request.sender,
-        transaction_id=parsed.reference_number if parsed else None,
-        transaction_date=transaction_date,
-        is_verified=False
-    )
-    
-    db.add(transaction)
     await db.commit()
-    await db.refresh(transaction)
     
     return SmsTransactionResponse(
-        id=transaction.id,
+        id=transaction_id,
         status="created",
         message="Transaction created successfully"
     )
@@ -213,72 +368,51 @@ async def upload_sms_transactions_batch(
     """Upload multiple SMS transactions in batch from the Android app"""
     
     total_received = len(requests)
-    total_processed = 0
     total_failed = 0
-    total_duplicates = 0
-    transaction_ids = []
     
+    # Hash every SMS up front; repeats within the batch collapse onto the
+    # first occurrence
+    batch_hashes = []
+    rows = {}
     for request in requests:
         try:
-            # Generate hash to check for duplicates
             sms_hash = generate_sms_hash(request.sms_body, request.sender, request.timestamp)
-            
-            # Check for duplicates
-            existing_query = select(Transaction).where(
-                and_(
-                    Transaction.user_id == current_user.id,
-                    Transaction.source_reference == sms_hash
-                )
-            )
-            existing = (await db.execute(existing_query)).scalar_one_or_none()
-            
-            if existing:
-                total_duplicates += 1
-                transaction_ids.append(existing.id)
-                continue
-            
-            # Parse transaction data
-            parsed = request.parsed_data
-            transaction_type = parse_transaction_type(parsed.transaction_type if parsed else None)
-            category = categorize_transaction(parsed)
-            
-            # Convert timestamp to datetime
-            transaction_date = datetime.fromtimestamp(request.timestamp / 1000)
-            
-            # Create transaction
-            transaction = Transaction(
-                id=str(uuid.uuid4()),
-                user_id=current_user.id,
-                amount=parsed.amount if parsed and parsed.amount else 0.0,
-                transaction_type=transaction_type,
-                category=category,
-                description=request.sms_body[:500],
-                merchant_name=parsed.merchant if parsed else None,
-                source=TransactionSource.SMS,
-                source_reference=sms_hash,
-                raw_data={
-                    "sms_body": request.sms_body,
-                    "sender": request.sender,
-                    "timestamp": request.timestamp,
-                    "parsed_data": parsed.dict() if parsed else None
-                },
-                account_number=parsed.account_number if parsed else None,
-                bank_name=parsed.bank_name if parsed else request.sender,
-                transaction_id=parsed.reference_number if parsed else None,
-                transaction_date=transaction_date,
-                is_verified=False
-            )
-            
-            db.add(transaction)
-            transaction_ids.append(transaction.id)
-            total_processed += 1
-            
+            if sms_hash not in rows:
+                rows[sms_hash] = sms_transaction_values(request, sms_hash, current_user.id)
+            batch_hashes.append(sms_hash)
         except Exception as e:
             total_failed += 1
             continue
     
+    created_ids = {}
+    if len(rows) > COPY_THRESHOLD:
+        created_ids = await copy_transactions(db, list(rows.values()))
+    elif rows:
+        result = await db.execute(
+            _sms_insert().returning(Transaction.source_reference, Transaction.id),
+            list(rows.values()),
+        )
+        created_ids = dict(result.all())
+    
+    # Anything not inserted was already uploaded
+    duplicate_hashes = [h for h in rows if h not in created_ids]
+    existing_ids = await _existing_sms_ids(db, current_user.id, duplicate_hashes) if duplicate_hashes else {}
+    
     await db.commit()
     
+    total_processed = 0
+    total_duplicates = 0
+    transaction_ids = []
+    for sms_hash in batch_hashes:
+        if sms_hash in created_ids:
+            # First occurrence is the insert; later repeats are duplicates
+            transaction_ids.append(created_ids.pop(sms_hash))
+            existing_ids[sms_hash] = transaction_ids[-1]
+            total_processed += 1
+        elif sms_hash in existing_ids:
+            transaction_ids.append(existing_ids[sms_hash])
+            total_duplicates += 1
+    
     return BatchTransactionResponse(
         total_received=total_received,
         total_processed=total_processed,
@@ -295,25 +429,15 @@ async def get_sync_status(
 ):
     """Get sync status for the user's SMS transactions"""
     
-    # Get last SMS transaction timestamp
-    last_sync_query = select(Transaction.transaction_date).where(
-        and_(
-            Transaction.user_id == current_user.id,
-            Transaction.source == TransactionSource.SMS
-        )
-    ).order_by(Transaction.transaction_date.desc()).limit(1)
-    
-    result = (await db.execute(last_sync_query)).scalar_one_or_none()
-    last_sync = int(result.timestamp() * 1000) if result else None
-    
-    # Get total SMS transactions count
-    count_query = select(func.count()).select_from(Transaction).where(
+    # Last SMS transaction timestamp and total count in one query
+    stats_query = select(func.max(Transaction.transaction_date), func.count()).where(
         and_(
             Transaction.user_id == current_user.id,
             Transaction.source == TransactionSource.SMS
         )
     )
-    total_synced = (await db.execute(count_query)).scalar() or 0
+    last_date, total_synced = (await db.execute(stats_query)).one()
+    last_sync = int(last_date.timestamp() * 1000) if last_date else None
     
     return SyncStatusResponse(
         last_sync=last_sync,
@@ -336,33 +460,61 @@ async def mark_sync_complete(
 
 @router.get("/transactions/sms", response_model=List[dict])
 async def get_sms_transactions(
+    response: Response,
     current_user: CurrentUser,
     db: AsyncSession = Depends(get_db),
     limit: int = 50,
-    offset: int = 0
+    offset: int = 0,
+    cursor: Optional[str] = None
 ):
-    """Get SMS-sourced transactions for the current user"""
+    """
+    Get SMS-sourced transactions for the current user, newest first.
+    
+    Pages are keyed on (transaction_date, id). When more transactions follow,
+    the ``X-Next-Cursor`` response header holds the cursor for the next page;
+    ``offset`` is still honoured when no cursor is given.
+    """
     
-    query = select(Transaction).where(
+    # Plain column rows: the ORM objects were only ever turned into dicts
+    query = select(
+        Transaction.id,
+        Transaction.amount,
+        Transaction.transaction_type,
+        Transaction.category,
+        Transaction.merchant_name,
+        Transaction.bank_name,
+        Transaction.transaction_date,
+        Transaction.is_verified,
+    ).where(
         and_(
             Transaction.user_id == current_user.id,
             Transaction.source == TransactionSource.SMS
         )
-    ).order_by(Transaction.transaction_date.desc()).offset(offset).limit(limit)
+    ).order_by(Transaction.transaction_date.desc(), Transaction.id.desc())
+    
+    if cursor:
+        query = query.where(tuple_(Transaction.transaction_date, Transaction.id) < _decode_cursor(cursor))
+    elif offset:
+        query = query.offset(offset)
+    
+    # One extra row tells us whether another page follows
+    result = await db.execute(query.limit(limit + 1))
+    rows = result.all()
     
-    result = await db.execute(query)
-    transactions = result.scalars().all()
+    if len(rows) > limit:
+        rows = rows[:limit]
+        response.headers["X-Next-Cursor"] = _encode_cursor(rows[-1])
     
     return [
         {
-            "id": t.id,
-            "amount": t.amount,
-            "transaction_type": t.transaction_type.value,
-            "category": t.category.value,
-            "merchant_name": t.merchant_name,
-            "bank_name": t.bank_name,
-            "transaction_date": t.transaction_date.isoformat(),
-            "is_verified": t.is_verified
+            "id": id_,
+            "amount": amount,
+            "transaction_type": transaction_type.value,
+            "category": category.value,
+            "merchant_name": merchant_name,
+            "bank_name": bank_name,
+            "transaction_date": transaction_date.isoformat(),
+            "is_verified": is_verified
         }
-        for t in transactions
+        for id_, amount, transaction_type, category, merchant_name, bank_name, transaction_date, is_verified in rows
     ]
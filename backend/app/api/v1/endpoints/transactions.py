@@ -98,8 +98,17 @@ async def get_transaction_stats(
     end_date: Optional[datetime] = None
 ):
     """Get transaction statistics."""
-    # Base query
-    base_query = select(Transaction).where(Transaction.user_id == current_user.id)
+    # One row per (type, category, merchant) instead of per transaction
+    base_query = (
+        select(
+            Transaction.transaction_type,
+            Transaction.category,
+            Transaction.merchant_name,
+            func.sum(Transaction.amount),
+        )
+        .where(Transaction.user_id == current_user.id)
+        .group_by(Transaction.transaction_type, Transaction.category, Transaction.merchant_name)
+    )
     
     if start_date:
         base_query = base_query.where(Transaction.transaction_date >= start_date)
@@ -107,24 +116,21 @@ async def get_transaction_stats(
         base_query = base_query.where(Transaction.transaction_date <= end_date)
     
     result = await db.execute(base_query)
-    transactions = result.scalars().all()
     
     # Calculate stats
-    total_income = sum(t.amount for t in transactions if t.transaction_type == TransactionType.CREDIT)
-    total_expenses = sum(t.amount for t in transactions if t.transaction_type == TransactionType.DEBIT)
-    
-    # By category
+    total_income = 0
+    total_expenses = 0
     by_category = {}
-    for t in transactions:
-        if t.transaction_type == TransactionType.DEBIT:
-            cat = t.category.value
-            by_category[cat] = by_category.get(cat, 0) + t.amount
-    
-    # Top merchants
     merchant_spending = {}
-    for t in transactions:
-        if t.merchant_name and t.transaction_type == TransactionType.DEBIT:
-            merchant_spending[t.merchant_name] = merchant_spending.get(t.merchant_name, 0) + t.amount
+    for txn_type, category, merchant_name, amount in result.all():
+        if txn_type == TransactionType.CREDIT:
+            total_income += amount
+        elif txn_type == TransactionType.DEBIT:
+            total_expenses += amount
+            cat = category.value
+            by_category[cat] = by_category.get(cat, 0) + amount
+            if merchant_name:
+                merchant_spending[merchant_name] = merchant_spending.get(merchant_name, 0) + amount
     
     top_merchants = [
         {"name": k, "amount": v}
@@ -6,6 +6,8 @@ from app.core.database import Base, async_session_maker, init_db, engine
 from app.core.security import (
     verify_password,
     get_password_hash,
+    verify_password_async,
+    hash_password_async,
     create_access_token,
     create_refresh_token,
     verify_token,
@@ -23,6 +25,8 @@ __all__ = [
     # Security
     "verify_password",
     "get_password_hash",
+    "verify_password_async",
+    "hash_password_async",
     "create_access_token",
     "create_refresh_token",
     "verify_token",
@@ -2,6 +2,9 @@
 Database configuration and session management
 """
 
+import asyncio
+
+import orjson
 from sqlalchemy.ext.asyncio import (
     AsyncSession,
     create_async_engine,
@@ -31,13 +34,35 @@ class Base(DeclarativeBase):
     metadata = metadata
 
 
+def _connect_args() -> dict:
+    """asyncpg connect() arguments derived from settings."""
+    if settings.DATABASE_TCP_KEEPALIVES_IDLE > 0:
+        return {
+            "server_settings": {
+                "tcp_keepalives_idle": str(settings.DATABASE_TCP_KEEPALIVES_IDLE),
+            }
+        }
+    return {}
+
+
+def _json_serializer(value) -> str:
+    """Serialize JSON column values with orjson (asyncpg expects str)."""
+    return orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS).decode()
+
+
 # Create async engine
 engine: AsyncEngine = create_async_engine(
     settings.async_database_url,
     echo=settings.SQL_ECHO,
     pool_size=settings.DATABASE_POOL_SIZE,
     max_overflow=settings.DATABASE_MAX_OVERFLOW,
+    pool_timeout=settings.DATABASE_POOL_TIMEOUT,
+    # Recycle before server/proxy idle timeouts silently drop connections
+    pool_recycle=settings.DATABASE_POOL_RECYCLE,
     pool_pre_ping=True,
+    connect_args=_connect_args(),
+    json_serializer=_json_serializer,
+    json_deserializer=orjson.loads,
 )
 
 # Session factory
@@ -60,6 +85,20 @@ async def init_db() -> None:
         await conn.run_sync(Base.metadata.create_all)
 
 
+async def warm_pool() -> None:
+    """Open DATABASE_POOL_WARM connections and return them to the pool.
+
+    SQLAlchemy's pool has no minimum size, so without this every connection
+    is established lazily by whichever request first needs it.
+    """
+    count = min(settings.DATABASE_POOL_WARM, settings.DATABASE_POOL_SIZE)
+    if count <= 0:
+        return
+    connections = await asyncio.gather(*(engine.connect() for _ in range(count)))
+    for conn in connections:
+        await conn.close()
+
+
 async def get_session() -> AsyncSession:
     """Get a database session."""
     async with async_session_maker() as session:
@@ -2,20 +2,28 @@
 FastAPI Dependency Injection
 """
 
-from typing import AsyncGenerator, Annotated
-from fastapi import Depends, HTTPException, status
+from typing import AsyncGenerator, Annotated, Dict
+from fastapi import Depends, FastAPI, HTTPException, Request, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.database import async_session_maker
 from app.core.security import verify_token
 from app.core.redis import get_redis_client
 from app.models.user import User
+from agents.base_agent import BaseAgent
+from agents.orchestrators import (
+    InvestmentOrchestrator,
+    FinancialProductsOrchestrator,
+    MoneyManagementOrchestrator,
+)
+from agents.block_1 import CategorizeAgent
+from agents.block_2 import Block2NewsAgent
 
 
 security = HTTPBearer()
 
-
 async def get_db() -> AsyncGenerator[AsyncSession, None]:
     """Get database session dependency."""
     async with async_session_maker() as session:
@@ -30,6 +38,39 @@ async def get_redis():
     return await get_redis_client()
 
 
+def init_agents(app: FastAPI) -> None:
+    """Create the shared agent instances on ``app.state`` (called from the app lifespan)."""
+    app.state.orchestrator = InvestmentOrchestrator(keep_history=False)
+    app.state.categorize_agent = CategorizeAgent(keep_history=False)
+    app.state.news_agent = Block2NewsAgent(keep_history=False)
+    # Chat routes keyed by the route names used in chat._route_message
+    app.state.chat_orchestrators = {
+        "investment": app.state.orchestrator,
+        "products": FinancialProductsOrchestrator(keep_history=False),
+        "money": MoneyManagementOrchestrator(keep_history=False),
+    }
+
+
+def get_orchestrator(request: Request) -> InvestmentOrchestrator:
+    """Get the shared investment orchestrator."""
+    return request.app.state.orchestrator
+
+
+def get_categorize_agent(request: Request) -> CategorizeAgent:
+    """Get the shared categorize agent."""
+    return request.app.state.categorize_agent
+
+
+def get_news_agent(request: Request) -> Block2NewsAgent:
+    """Get the shared block 2 news agent."""
+    return request.app.state.news_agent
+
+
+def get_chat_orchestrators(request: Request) -> Dict[str, BaseAgent]:
+    """Get the shared chat orchestrators, keyed by route."""
+    return request.app.state.chat_orchestrators
+
+
 async def get_current_user(
     credentials: Annotated[HTTPAuthorizationCredentials, Depends(security)],
     db: AsyncSession = Depends(get_db)
@@ -53,7 +94,6 @@ async def get_current_user(
         )
     
     # Query user from database
-    from sqlalchemy import select
     result = await db.execute(select(User).where(User.id == user_id))
     user = result.scalar_one_or_none()
     
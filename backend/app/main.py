@@ -7,10 +7,12 @@ from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse
 
 from app.config import settings
 from app.core.logging import setup_logging
-from app.core.database import init_db
+from app.core.database import init_db, warm_pool
+from app.dependencies import init_agents
 from app.api.v1.router import api_router
 from app.api.websocket.connections import websocket_router
 
@@ -21,6 +23,10 @@ async def lifespan(app: FastAPI):
     # Startup
     setup_logging()
     await init_db()
+    await warm_pool()
+    # Agents are built once and shared across requests so their LLM
+    # clients (and HTTP connection pools) are reused.
+    init_agents(app)
     yield
     # Shutdown
     pass
@@ -37,6 +43,7 @@ def create_application() -> FastAPI:
         redoc_url="/redoc",
         openapi_url="/openapi.json",
         lifespan=lifespan,
+        default_response_class=ORJSONResponse,
     )
     
     # CORS Middleware
@@ -46,6 +53,7 @@ def create_application() -> FastAPI:
         allow_credentials=True,
         allow_methods=["*"],
         allow_headers=["*"],
+        expose_headers=["X-Next-Cursor"],
     )
     
     # Gzip Compression
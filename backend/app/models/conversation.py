@@ -7,13 +7,17 @@ from typing import Optional, List
 from enum import Enum
 import uuid
 
-from sqlalchemy import String, DateTime, Text, ForeignKey, Enum as SQLEnum, JSON, Boolean
+from sqlalchemy import String, DateTime, Text, ForeignKey, Enum as SQLEnum, JSON, Boolean, Index, func
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from sqlalchemy.dialects.postgresql import UUID
 
 from app.core.database import Base
 
 
+# Current UTC time from the database clock, for naive UTC timestamp columns
+_utc_now = func.timezone("utc", func.now())
+
+
 class MessageRole(str, Enum):
     """Message role enumeration."""
     USER = "user"
@@ -26,6 +30,9 @@ class Conversation(Base):
     """Conversation model for chat sessions."""
     
     __tablename__ = "conversations"
+    # Read the DB-generated updated_at back with RETURNING instead of
+    # leaving it expired after an UPDATE
+    __mapper_args__ = {"eager_defaults": True}
     
     id: Mapped[str] = mapped_column(
         UUID(as_uuid=False),
@@ -55,7 +62,8 @@ class Conversation(Base):
     updated_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=False),
         default=datetime.utcnow,
-        onupdate=datetime.utcnow
+        # Stamped by the database (naive UTC, like the other timestamps)
+        onupdate=_utc_now
     )
     
     # Relationships
@@ -75,6 +83,10 @@ class Message(Base):
     """Message model for individual chat messages."""
     
     __tablename__ = "messages"
+    __table_args__ = (
+        # Keyset pagination of a conversation's messages by (created_at, id)
+        Index("ix_messages_conversation_created", "conversation_id", "created_at", "id"),
+    )
     
     id: Mapped[str] = mapped_column(
         UUID(as_uuid=False),
@@ -7,7 +7,7 @@ from typing import Optional, List
 from enum import Enum
 import uuid
 
-from sqlalchemy import String, Float, DateTime, Text, ForeignKey, Enum as SQLEnum, JSON, Integer
+from sqlalchemy import String, Float, DateTime, Text, ForeignKey, Enum as SQLEnum, JSON, Integer, Computed, Index, text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from sqlalchemy.dialects.postgresql import UUID
 
@@ -44,6 +44,17 @@ class Investment(Base):
     """Investment model for portfolio tracking."""
     
     __tablename__ = "investments"
+    __table_args__ = (
+        # Portfolio top/worst performers: ORDER BY percentage_return LIMIT 5
+        # over a user's active investments, read from either end
+        Index(
+            "ix_inv_user_active_return",
+            "user_id",
+            "percentage_return",
+            postgresql_include=["name"],
+            postgresql_where=text("status = 'ACTIVE'"),
+        ),
+    )
     
     id: Mapped[str] = mapped_column(
         UUID(as_uuid=False),
@@ -71,9 +82,18 @@ class Investment(Base):
     invested_amount: Mapped[float] = mapped_column(Float, nullable=False)
     current_value: Mapped[Optional[float]] = mapped_column(Float)
     
-    # Returns
-    absolute_return: Mapped[Optional[float]] = mapped_column(Float)
-    percentage_return: Mapped[Optional[float]] = mapped_column(Float)
+    # Returns (generated by PostgreSQL from current_value / invested_amount)
+    absolute_return: Mapped[Optional[float]] = mapped_column(
+        Float,
+        Computed("current_value - invested_amount", persisted=True)
+    )
+    percentage_return: Mapped[Optional[float]] = mapped_column(
+        Float,
+        Computed(
+            "(current_value - invested_amount) / NULLIF(invested_amount, 0) * 100",
+            persisted=True
+        )
+    )
     xirr: Mapped[Optional[float]] = mapped_column(Float)
     
     # For SIP/Recurring
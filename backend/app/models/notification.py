@@ -6,7 +6,7 @@ from datetime import datetime
 from typing import Optional
 import uuid
 
-from sqlalchemy import String, DateTime, Boolean, ForeignKey, JSON, Text
+from sqlalchemy import String, DateTime, Boolean, ForeignKey, JSON, Text, Index, text
 from sqlalchemy.orm import Mapped, mapped_column
 from sqlalchemy.dialects.postgresql import UUID
 
@@ -17,6 +17,16 @@ class Notification(Base):
     """Persisted user notification (for in-app / websocket delivery)."""
 
     __tablename__ = "notifications"
+    __table_args__ = (
+        # Per-user unread feed (cash-check notifications); only unread rows
+        # are indexed, so it stays small as notifications are read.
+        Index(
+            "ix_notif_user_unread",
+            "user_id",
+            text("created_at DESC"),
+            postgresql_where=text("is_read = false"),
+        ),
+    )
 
     id: Mapped[str] = mapped_column(
         UUID(as_uuid=False),
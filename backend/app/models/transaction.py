@@ -7,7 +7,7 @@ from typing import Optional
 from enum import Enum
 import uuid
 
-from sqlalchemy import String, Float, DateTime, Text, ForeignKey, Enum as SQLEnum, JSON
+from sqlalchemy import String, Float, DateTime, Text, ForeignKey, Enum as SQLEnum, JSON, Index, text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from sqlalchemy.dialects.postgresql import UUID
 
@@ -42,10 +42,35 @@ class TransactionSource(str, Enum):
     BANK_API = "bank_api"
 
 
+# SMS uploads are deduplicated on (user_id, source_reference); the unique
+# index and ON CONFLICT inference must use the same predicate.
+SMS_REFERENCE_PREDICATE = text("source = 'SMS'")
+
+
 class Transaction(Base):
     """Transaction model for financial records."""
     
     __tablename__ = "transactions"
+    __table_args__ = (
+        # Per-user "most recent transactions" scans (ORDER BY transaction_date DESC
+        # walks the index backwards); INCLUDE makes the aggregates index-only.
+        Index(
+            "ix_tx_user_date",
+            "user_id",
+            "transaction_date",
+            postgresql_include=["amount", "transaction_type", "category"],
+        ),
+        # SMS sync status (MAX/COUNT per user and source) and the keyset-paged
+        # SMS list ordered by (transaction_date, id)
+        Index("ix_tx_user_source_date", "user_id", "source", "transaction_date", "id"),
+        Index(
+            "ux_tx_user_sms_ref",
+            "user_id",
+            "source_reference",
+            unique=True,
+            postgresql_where=SMS_REFERENCE_PREDICATE,
+        ),
+    )
     
     id: Mapped[str] = mapped_column(
         UUID(as_uuid=False),